@@ -50,10 +50,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "ticket_service.instrumentation.InstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "ticket_service.db_router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -81,16 +83,152 @@ WSGI_APPLICATION = "airport.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_ENGINE=postgresql switches to PostgreSQL configured from POSTGRES_*;
+# anything else keeps the local SQLite file, tuned for concurrent bookings.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", 0))
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "airport"),
+            "USER": os.getenv("POSTGRES_USER", "airport"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+            "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            # Persistent connections are reused across requests; health checks
+            # drop ones the server closed. Pooling (psycopg_pool) replaces them.
+            "CONN_MAX_AGE": 0 if POSTGRES_POOL_MAX_SIZE else int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "connect_timeout": int(os.getenv("POSTGRES_CONNECT_TIMEOUT", 5)),
+            },
+        }
+    }
+    if POSTGRES_POOL_MAX_SIZE:
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": POSTGRES_POOL_MAX_SIZE,
+            "timeout": int(os.getenv("POSTGRES_POOL_TIMEOUT", 10)),
+        }
+else:
+    # journal_mode is persisted in the database file, so it is only switched
+    # on request: SQLITE_JOURNAL_MODE=wal lets readers run alongside the
+    # single writer, but would rewrite the committed db.sqlite3.
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "").lower()
+    SQLITE_JOURNAL_PRAGMAS = ""
+    if SQLITE_JOURNAL_MODE:
+        SQLITE_JOURNAL_PRAGMAS = f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE};"
+    if SQLITE_JOURNAL_MODE == "wal":
+        # Durable in WAL mode; only a power loss can drop the last commits.
+        SQLITE_JOURNAL_PRAGMAS += "PRAGMA synchronous=NORMAL;"
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                # IMMEDIATE takes the write lock at BEGIN so concurrent bookings
+                # queue on busy_timeout instead of failing with "database is
+                # locked".
+                "transaction_mode": "IMMEDIATE",
+                "timeout": int(os.getenv("SQLITE_TIMEOUT", 20)),
+                "init_command": (
+                    SQLITE_JOURNAL_PRAGMAS
+                    + "PRAGMA foreign_keys=ON;"
+                    "PRAGMA temp_store=MEMORY;"
+                    "PRAGMA mmap_size=134217728;"
+                    "PRAGMA cache_size=-20000;"
+                ),
+            },
+            # A file rather than the in-memory default, so that tests can
+            # book from several threads at once.
+            "TEST": {"NAME": os.getenv("SQLITE_TEST_PATH", BASE_DIR / "test_db.sqlite3")},
+        }
     }
+
+# Read replicas for the public catalog, as comma-separated POSTGRES_REPLICA_HOSTS
+# or, locally, SQLITE_REPLICA_PATHS (copies of the primary file).
+if DB_ENGINE == "postgresql":
+    _replica_overrides = [
+        {"HOST": host.strip()}
+        for host in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")
+        if host.strip()
+    ]
+else:
+    _replica_overrides = [
+        {"NAME": path.strip()}
+        for path in os.getenv("SQLITE_REPLICA_PATHS", "").split(",")
+        if path.strip()
+    ]
+DATABASE_REPLICAS = []
+for _index, _override in enumerate(_replica_overrides):
+    DATABASES[f"replica_{_index}"] = {
+        **DATABASES["default"],
+        **_override,
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{_index}")
+
+DATABASE_ROUTERS = ["ticket_service.db_router.ReplicaRouter"]
+
+# Seconds a user's catalog reads stay on the primary after they write.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "flights": {
+        "BACKEND": os.getenv(
+            "FLIGHT_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("FLIGHT_CACHE_LOCATION", "flights"),
+        # Upper bound (seconds) on how stale cached flight responses may get.
+        "TIMEOUT": int(os.getenv("FLIGHT_CACHE_TIMEOUT", 30)),
+    },
+    # Rate-limit buckets; point this at Redis or Memcached so that every
+    # worker shares them. The backend must implement an atomic incr().
+    "throttle": {
+        "BACKEND": os.getenv(
+            "THROTTLE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("THROTTLE_CACHE_LOCATION", "throttle"),
+    },
+    # Read-your-writes pins; must be shared by every worker, or a user's
+    # next request on another worker reads a lagging replica.
+    "replica_pins": {
+        "BACKEND": os.getenv(
+            "REPLICA_PIN_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("REPLICA_PIN_CACHE_LOCATION", "replica_pins"),
+    },
+    # Users resolved from access tokens; must be shared by every worker, or
+    # a save on one worker leaves the others serving the stale user.
+    "users": {
+        "BACKEND": os.getenv(
+            "AUTH_USER_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("AUTH_USER_CACHE_LOCATION", "users"),
+    },
 }
 
+FLIGHT_CACHE_ALIAS = "flights"
+THROTTLE_CACHE_ALIAS = "throttle"
+REPLICA_PIN_CACHE_ALIAS = "replica_pins"
+AUTH_USER_CACHE_ALIAS = "users"
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -106,12 +244,18 @@ REST_FRAMEWORK = {
         "drf_spectacular.openapi.AutoSchema",
 
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'ticket_service.throttling.TokenBucketThrottle',
     ],
+    # Token buckets per scope, see ticket_service/throttling.py; anonymous
+    # clients use "<scope>_anon" when present. Users keep the 100/day and
+    # anonymous clients the 10/minute budget, except for cheap catalog reads.
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '10/minute',
-        'user': '100/day',
+        'default': '100/day',
+        'default_anon': '10/minute',
+        'search': '120/minute',
+        'search_anon': '30/minute',
+        'booking': '100/day',
+        'export': '100/day',
     },
 }
 # Password validation
@@ -147,6 +291,19 @@ SPECTACULAR_SETTINGS = {
 
 AUTH_USER_MODEL = "user.User"
 
+# How long (in seconds) a seat hold keeps a seat reserved during checkout.
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", 600))
+
+# Seconds an authenticated user stays cached; saves and deletes evict it.
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 300))
+
+# Fan-out for the live seat feed; the default only reaches watchers in-process.
+SEAT_FEED_BACKEND = os.getenv("SEAT_FEED_BACKEND", "ticket_service.seat_feed.InProcessSeatFeed")
+SEAT_FEED_KEEPALIVE = int(os.getenv("SEAT_FEED_KEEPALIVE", 15))
+
+# A statement run this many times in one request is logged as an N+1 candidate.
+INSTRUMENTATION_DUPLICATE_SQL = int(os.getenv("INSTRUMENTATION_DUPLICATE_SQL", 3))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
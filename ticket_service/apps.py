@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class TicketServiceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ticket_service"
+
+    def ready(self):
+        import ticket_service.signals  # noqa: F401
+        from ticket_service.instrumentation import (
+            install_query_recording,
+            install_serializer_timing,
+        )
+
+        install_query_recording()
+        install_serializer_timing()
@@ -0,0 +1,155 @@
+"""Async versions of the public flight endpoints for ASGI deployments.
+
+Authentication, permission and throttle checks reuse FlightList so both
+stacks enforce the same policy; rows are then read with the async ORM and
+rendered by the values serializers, so the JSON matches the DRF views.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler
+
+from ticket_service.models import Crew, Flight
+from ticket_service.seat_feed import RESYNC, seat_feed
+from ticket_service.seat_map import aget_seat_map
+from ticket_service.values_serializers import (
+    FlightDetailValuesSerializer,
+    FlightListValuesSerializer,
+)
+from ticket_service.views import FlightList
+
+JSON_DUMPS_PARAMS = {"separators": (",", ":"), "ensure_ascii": False}
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, safe=False, json_dumps_params=JSON_DUMPS_PARAMS
+    )
+
+
+def _flight_view(request, action, **kwargs):
+    view = FlightList(
+        action_map={"get": action}, args=(), kwargs=kwargs, format_kwarg=None
+    )
+    view.request = view.initialize_request(request, **kwargs)
+    view.initial(view.request, **kwargs)
+    return view
+
+
+def _error(exc, view=None):
+    response = exception_handler(
+        exc, {"view": view, "request": getattr(view, "request", None)}
+    )
+    json_response = _json(response.data, status=response.status_code)
+    for header, value in response.items():
+        if header != "Content-Type":
+            json_response[header] = value
+    return json_response
+
+
+def _flight_list_page(view):
+    queryset = view.filter_queryset(view.get_queryset())
+    queryset = FlightListValuesSerializer.prepare(
+        queryset, view._ordering_columns(queryset)
+    )
+    page = view.paginate_queryset(queryset)
+    return view.get_paginated_response(FlightListValuesSerializer.serialize(page)).data
+
+
+@require_GET
+async def flight_list(request):
+    try:
+        view = await sync_to_async(_flight_view)(request, "list")
+        # Cursor pagination is synchronous, so the page query runs in a thread.
+        return _json(await sync_to_async(_flight_list_page)(view))
+    except APIException as exc:
+        return _error(exc)
+
+
+@require_GET
+async def flight_detail(request, pk):
+    try:
+        await sync_to_async(_flight_view)(request, "retrieve", pk=pk)
+    except APIException as exc:
+        return _error(exc)
+    queryset = FlightDetailValuesSerializer.prepare(
+        Flight.objects.with_tickets_available()
+    )
+    try:
+        row = await queryset.aget(pk=pk)
+    except Flight.DoesNotExist:
+        return _error(Http404("No Flight matches the given query."))
+    data = FlightDetailValuesSerializer.serialize([row])[0]
+    data["crew"] = [
+        {"full_name": f"{first_name} {last_name}"}
+        async for first_name, last_name in Crew.objects.filter(flight=pk).values_list(
+            "first_name", "last_name"
+        )
+    ]
+    return _json(data)
+
+
+@require_GET
+async def flight_seats(request, pk):
+    try:
+        await sync_to_async(_flight_view)(request, "seats", pk=pk)
+    except APIException as exc:
+        return _error(exc)
+    seat_map = await aget_seat_map(pk)
+    if seat_map is None:
+        return _error(Http404("No Flight matches the given query."))
+    grid = request.GET.get("grid", "").lower() in ("1", "true")
+    return _json(seat_map.to_representation(grid=grid))
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, **JSON_DUMPS_PARAMS)}\n\n"
+
+
+async def _seat_events(subscription, seat_map):
+    try:
+        yield _sse("snapshot", seat_map.to_representation())
+        while True:
+            try:
+                event, data = await asyncio.wait_for(
+                    anext(subscription), timeout=settings.SEAT_FEED_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event == RESYNC:
+                seat_map = await aget_seat_map(subscription.flight_id)
+                if seat_map is None:
+                    return
+                yield _sse("snapshot", seat_map.to_representation())
+            else:
+                yield _sse(event, data)
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def flight_seat_events(request, pk):
+    """Server-sent events: a seat map snapshot, then seat-taken/seat-released deltas."""
+    try:
+        await sync_to_async(_flight_view)(request, "seats", pk=pk)
+    except APIException as exc:
+        return _error(exc)
+    # Subscribe before reading the snapshot so no delta falls in between.
+    subscription = seat_feed().subscribe(pk)
+    seat_map = await aget_seat_map(pk)
+    if seat_map is None:
+        subscription.close()
+        return _error(Http404("No Flight matches the given query."))
+    response = StreamingHttpResponse(
+        _seat_events(subscription, seat_map), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
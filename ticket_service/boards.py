@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ticket_service.models import BoardEntry, Flight
+
+BOARD_CACHE_TIMEOUT = 60 * 5
+BOARD_FIELDS = ("flight_id", "scheduled_time", "counterpart", "airplane")
+
+
+def board_cache_key(airport_id, date, direction):
+    return f"ticket_service:board:{airport_id}:{date.isoformat()}:{direction}"
+
+
+def _entry_keys(entries):
+    return {
+        board_cache_key(airport_id, date, direction)
+        for airport_id, date, direction in entries
+    }
+
+
+def _entries_for(flight):
+    return [
+        BoardEntry(
+            airport_id=flight.route.source_id,
+            direction=BoardEntry.DEPARTURE,
+            date=timezone.localdate(flight.departure_time),
+            scheduled_time=flight.departure_time,
+            flight=flight,
+            counterpart=str(flight.route.destination),
+            airplane=flight.airplane.name,
+        ),
+        BoardEntry(
+            airport_id=flight.route.destination_id,
+            direction=BoardEntry.ARRIVAL,
+            date=timezone.localdate(flight.arrival_time),
+            scheduled_time=flight.arrival_time,
+            flight=flight,
+            counterpart=str(flight.route.source),
+            airplane=flight.airplane.name,
+        ),
+    ]
+
+
+@transaction.atomic
+def refresh_boards(flights):
+    """Re-materialize the board rows of the given flights queryset in bulk."""
+    flights = flights.select_related("airplane", "route__source", "route__destination")
+    flight_ids = list(flights.values_list("id", flat=True))
+    stale = BoardEntry.objects.filter(flight_id__in=flight_ids)
+    touched = set(stale.values_list("airport_id", "date", "direction"))
+    stale.delete()
+
+    entries = [
+        entry
+        for flight in flights.iterator(chunk_size=2000)
+        for entry in _entries_for(flight)
+    ]
+    BoardEntry.objects.bulk_create(entries, batch_size=2000)
+    touched.update((entry.airport_id, entry.date, entry.direction) for entry in entries)
+    transaction.on_commit(lambda: cache.delete_many(list(_entry_keys(touched))))
+    return len(entries)
+
+
+def refresh_flight_boards(*flight_ids):
+    return refresh_boards(Flight.objects.filter(id__in=flight_ids))
+
+
+def forget_flight_boards(flight):
+    """Invalidate the cached boards a deleted flight appeared on, once the delete commits.
+
+    The keys are collected now, while the board rows still exist; deleting
+    them before commit would let a concurrent get_board re-cache the flight.
+    """
+    keys = list(
+        _entry_keys(
+            BoardEntry.objects.filter(flight_id=flight.id).values_list(
+                "airport_id", "date", "direction"
+            )
+        )
+    )
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_board(airport_id, date, direction):
+    key = board_cache_key(airport_id, date, direction)
+    board = cache.get(key)
+    if board is None:
+        board = list(
+            BoardEntry.objects.filter(
+                airport_id=airport_id, direction=direction, date=date
+            )
+            .order_by("scheduled_time")
+            .values(*BOARD_FIELDS)
+        )
+        cache.set(key, board, BOARD_CACHE_TIMEOUT)
+    return board
@@ -0,0 +1,113 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from ticket_service.mixins import ConditionalGetMixin
+
+CATALOG_VERSION_KEY = "ticket_service:flights:catalog"
+LISTING_VERSION_KEY = "ticket_service:flights:listing"
+
+
+def flight_cache():
+    return caches[settings.FLIGHT_CACHE_ALIAS]
+
+
+def flight_version_key(flight_id):
+    return f"ticket_service:flights:flight:{flight_id}"
+
+
+def _bump(*keys):
+    now = time.time()
+    flight_cache().set_many({key: now for key in keys}, timeout=None)
+    return now
+
+
+def invalidate_catalog():
+    """Drop every cached flight response; used when routes, airports, airplanes or crew change.
+
+    Returns the new catalog version.
+    """
+    return _bump(CATALOG_VERSION_KEY)
+
+
+def invalidate_flights(*flight_ids):
+    """Drop cached listings and the detail responses of the given flights."""
+    _bump(
+        LISTING_VERSION_KEY,
+        *(flight_version_key(flight_id) for flight_id in flight_ids),
+    )
+
+
+def invalidate_availability(*flight_ids):
+    """Drop the detail responses of flights whose seats were booked, held or released.
+
+    Cached listings are left alone so a sales spike on one flight does not
+    empty the cache for every search; the availability they show lags by
+    at most the alias TIMEOUT (FLIGHT_CACHE_TIMEOUT).
+    """
+    if flight_ids:
+        _bump(*(flight_version_key(flight_id) for flight_id in flight_ids))
+
+
+def _versions(keys):
+    cache = flight_cache()
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def catalog_version():
+    return _versions([CATALOG_VERSION_KEY])[0]
+
+
+class CachedFlightResponseMixin(ConditionalGetMixin):
+    """Serve the public flight list/retrieve actions from FLIGHT_CACHE_ALIAS.
+
+    Instead of a queryset watermark, validators come from version stamps
+    that signals bump on writes, so both 304s and cache hits cost no query.
+    The ETag covers the normalized query string (filters, ordering and
+    cursor) and doubles as the cache key. Bookings and holds only bump the
+    flight's own version, so listings keep being served from the cache. ETags
+    rotate and entries expire after the alias TIMEOUT, which bounds how stale
+    listed availability, and writes that bypass signals, can get.
+    """
+
+    cache_control = "public, no-cache"
+
+    def _version_keys(self):
+        if self.action == "retrieve":
+            flight_id = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return [CATALOG_VERSION_KEY, flight_version_key(flight_id)]
+        return [CATALOG_VERSION_KEY, LISTING_VERSION_KEY]
+
+    def get_validators(self):
+        versions = _versions(self._version_keys())
+        query = sorted(self.request.query_params.lists())
+        timeout = flight_cache().default_timeout
+        # Rotate validators every TIMEOUT so unsignalled changes cannot pin a 304 forever.
+        bucket = int(time.time() // timeout) if timeout else 0
+        fingerprint = (
+            f"{self.request.get_host()}{self.request.path}|{query}|{versions}|{bucket}"
+        )
+        etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+        return etag, datetime.fromtimestamp(max(versions), tz=timezone.utc)
+
+    def render_response(self, request, render, etag, *args, **kwargs):
+        cache = flight_cache()
+        key = "ticket_service:flights:response:" + etag.strip('"')
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = render(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        return response
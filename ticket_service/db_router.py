@@ -0,0 +1,114 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+CATALOG_MODELS = {"airport", "route", "airplane", "airplanetype", "crew", "flight"}
+
+_current_request = ContextVar("ticket_service_request", default=None)
+
+
+def pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+def primary_pin_key(user_pk):
+    return f"ticket_service:replica:pin:{user_pk}"
+
+
+def pin_to_primary(user):
+    """Keep ``user``'s catalog reads on the primary for REPLICA_PIN_SECONDS."""
+    pin_cache().set(primary_pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def _replica_allowed():
+    request = _current_request.get()
+    if request is None or request.method not in SAFE_METHODS:
+        return False
+    if connections["default"].in_atomic_block:
+        return False
+    allowed = getattr(request, "_replica_allowed", None)
+    if allowed is None:
+        # Catalog reads happen after DRF authentication, which has already
+        # replaced request.user with the token's user by now.
+        user = getattr(request, "user", None)
+        pinned = bool(
+            user and user.is_authenticated and pin_cache().get(primary_pin_key(user.pk))
+        )
+        allowed = request._replica_allowed = not pinned
+    return allowed
+
+
+class ReplicaRouter:
+    """Send catalog reads made while serving safe requests to a replica.
+
+    Everything else - writes, orders, tickets, reads outside a request or
+    inside a transaction, and reads by a user who wrote in the last
+    REPLICA_PIN_SECONDS - uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not settings.DATABASE_REPLICAS or model._meta.app_label != "ticket_service":
+            return None
+        if model._meta.model_name in CATALOG_MODELS and _replica_allowed():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Expose the request to ReplicaRouter and pin users after they write."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _pin_after_write(request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        self._pin_after_write(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        if request.method not in SAFE_METHODS:
+            await sync_to_async(self._pin_after_write)(request, response)
+        return response
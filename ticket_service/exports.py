@@ -0,0 +1,90 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+TICKET_EXPORT_FIELDS = (
+    "id",
+    "order_id",
+    "order__created_at",
+    "user__email",
+    "flight_id",
+    "flight__departure_time",
+    "row",
+    "seat",
+)
+ORDER_EXPORT_FIELDS = (
+    "id",
+    "user_id",
+    "user__email",
+    "created_at",
+)
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(rows, fields):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), default=str) + "\n"
+
+
+def _parse_param(params, param):
+    try:
+        value = parse_datetime(params[param])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({param: ["Use an ISO 8601 datetime."]})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def filter_created(queryset, params, field):
+    """Narrow ``queryset`` by ?created_after= / ?created_before= on ``field``.
+
+    Raises ValidationError (400) for values that are not valid datetimes.
+    """
+    for param, lookup in (("created_after", "gte"), ("created_before", "lt")):
+        if params.get(param):
+            value = _parse_param(params, param)
+            queryset = queryset.filter(**{f"{field}__{lookup}": value})
+    return queryset
+
+
+def export_response(queryset, fields, output, filename):
+    """Stream ``queryset`` as CSV or NDJSON without materializing it.
+
+    Rows come from a ``values_list`` projection read in EXPORT_CHUNK_SIZE
+    chunks, so memory stays flat regardless of how many rows match.
+    """
+    rows = (
+        queryset.order_by("id")
+        .values_list(*fields)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    lines = _csv_lines(rows, fields) if output == "csv" else _ndjson_lines(rows, fields)
+    response = StreamingHttpResponse(lines, content_type=EXPORT_CONTENT_TYPES[output])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -0,0 +1,31 @@
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from ticket_service.models import Flight
+
+
+class FlightFilter(django_filters.FilterSet):
+    departure_time__date = django_filters.DateFilter(method="filter_departure_date")
+    min_tickets_available = django_filters.NumberFilter(
+        field_name="tickets_available",
+        lookup_expr="gte",
+    )
+
+    class Meta:
+        model = Flight
+        fields = {
+            "route__destination": ["exact"],
+            "route__source": ["exact"],
+            "departure_time": ["exact", "gte", "lte"],
+        }
+
+    @staticmethod
+    def filter_departure_date(queryset, name, value):
+        # A half-open range keeps (route, departure_time) usable, unlike __date.
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        return queryset.filter(
+            departure_time__gte=start,
+            departure_time__lt=start + timedelta(days=1),
+        )
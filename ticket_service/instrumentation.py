@@ -0,0 +1,281 @@
+"""Per-endpoint request metrics exposed in the Prometheus text format.
+
+InstrumentationMiddleware measures every request - DB queries and SQL time
+via an ``execute_wrapper`` on every connection, serializer time, response
+size and total latency
+- and files them under the endpoint name ``<router basename>-<action>``
+(e.g. ``flights-list``). Statements repeated INSTRUMENTATION_DUPLICATE_SQL
+times within one request are logged as N+1 candidates.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import BaseRenderer
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("ticket_service_request_metrics", default=None)
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    "request_duration_seconds": ("Request latency.", TIME_BUCKETS),
+    "db_queries": ("Database queries per request.", COUNT_BUCKETS),
+    "db_time_seconds": ("Time spent executing SQL per request.", TIME_BUCKETS),
+    "serializer_time_seconds": (
+        "Serializer time per request, SQL excluded.",
+        TIME_BUCKETS,
+    ),
+    "response_size_bytes": ("Response body size.", SIZE_BUCKETS),
+}
+METRIC_PREFIX = "ticket_service_"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.total += value
+
+    def lines(self, name, endpoint):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{endpoint="{endpoint}"}} {self.total}'
+        yield f'{name}_count{{endpoint="{endpoint}"}} {cumulative}'
+
+
+class MetricsRegistry:
+    """In-process histograms and counters keyed by endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {
+                name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+                for name, (_, buckets) in HISTOGRAMS.items()
+            }
+            self.duplicate_sql = Counter()
+
+    def record(self, endpoint, metrics):
+        with self._lock:
+            for name, value in metrics.observations().items():
+                self.histograms[name][endpoint].observe(value)
+            if metrics.duplicates:
+                self.duplicate_sql[endpoint] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (description, _) in HISTOGRAMS.items():
+                full_name = METRIC_PREFIX + name
+                lines += [
+                    f"# HELP {full_name} {description}",
+                    f"# TYPE {full_name} histogram",
+                ]
+                for endpoint, histogram in sorted(self.histograms[name].items()):
+                    lines.extend(histogram.lines(full_name, endpoint))
+            full_name = METRIC_PREFIX + "duplicate_sql_requests_total"
+            lines += [
+                f"# HELP {full_name} Requests that repeated a statement (N+1 candidates).",
+                f"# TYPE {full_name} counter",
+            ]
+            for endpoint, count in sorted(self.duplicate_sql.items()):
+                lines.append(f'{full_name}{{endpoint="{endpoint}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors such as 403 arrive as dicts.
+        return "\n".join(f"# {key}: {value}" for key, value in data.items()).encode(
+            self.charset
+        )
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = Counter()
+        self.duration = None
+        self.response_size = None
+        self.duplicates = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def finish(self, response):
+        self.duration = time.perf_counter() - self.started
+        if not response.streaming:
+            self.response_size = len(response.content)
+        threshold = settings.INSTRUMENTATION_DUPLICATE_SQL
+        self.duplicates = {
+            sql: count for sql, count in self.statements.items() if count >= threshold
+        }
+
+    def observations(self):
+        values = {
+            "request_duration_seconds": self.duration,
+            "db_queries": self.queries,
+            "db_time_seconds": self.db_time,
+            "serializer_time_seconds": self.serializer_time,
+        }
+        if self.response_size is not None:
+            values["response_size_bytes"] = self.response_size
+        return values
+
+
+@contextmanager
+def serializer_timer():
+    """Add the enclosed time, minus SQL it ran, to the request's serializer time."""
+    metrics = _current.get()
+    if metrics is None or metrics.serializer_depth:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started, db_time = time.perf_counter(), metrics.db_time
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        metrics.serializer_time += (
+            time.perf_counter() - started - (metrics.db_time - db_time)
+        )
+
+
+def install_serializer_timing():
+    """Time BaseSerializer.data, the single entry point of top-level serialization."""
+    data = BaseSerializer.data
+    if getattr(data.fget, "instrumented", False):
+        return
+
+    def timed_data(self):
+        with serializer_timer():
+            return data.fget(self)
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def _add_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        # First, so that execute_wrapper() blocks still pop their own wrapper.
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def install_query_recording():
+    """Record SQL on every connection, whichever thread it belongs to.
+
+    Under ASGI the ORM runs in sync_to_async worker threads, each with its
+    own connections; the request's metrics reach them through the ContextVar
+    that asgiref copies into the thread.
+    """
+    connection_created.connect(
+        _add_query_recorder, dispatch_uid="ticket_service_query_recording"
+    )
+    for connection in connections.all(initialized_only=True):
+        _add_query_recorder(None, connection)
+
+
+def endpoint_name(request):
+    match = request.resolver_match
+    if match is None:
+        return "unresolved"
+    view = match.func
+    basename = getattr(view, "initkwargs", {}).get("basename")
+    action = getattr(view, "actions", {}).get(request.method.lower())
+    if basename and action:
+        return f"{basename}-{action}"
+    return match.url_name or match.view_name
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics)
+
+    def _finish(self, request, response, metrics):
+        metrics.finish(response)
+        endpoint = endpoint_name(request)
+        for sql, count in metrics.duplicates.items():
+            logger.warning("Possible N+1 in %s: %d x %s", endpoint, count, sql)
+        registry.record(endpoint, metrics)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, metrics)
+        return response
@@ -0,0 +1,261 @@
+import heapq
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from ticket_service.cache import catalog_version
+from ticket_service.models import Airport, Flight, Route
+
+# Candidate paths looked up per search; bounds the route ids sent to the
+# flight query however dense the network is around the two airports.
+MAX_CANDIDATE_PATHS = 500
+
+
+class RouteGraph:
+    """In-memory adjacency index of the Route graph.
+
+    ``edges`` maps a source airport id to ``{route_id: (destination_id,
+    distance)}``, ``incoming`` maps a destination airport id to
+    ``{route_id: (source_id, distance)}`` and ``routes`` maps a route id to
+    ``(source_id, destination_id, distance)``. The index is rebuilt when the
+    shared catalog version (bumped by Route/Airport changes in any process)
+    moves, and patched in place by this process's own route signals.
+    """
+
+    def __init__(self):
+        self.edges = defaultdict(dict)
+        self.incoming = defaultdict(dict)
+        self.routes = {}
+        self.airports = {}
+        self.version = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, version=None):
+        edges = defaultdict(dict)
+        incoming = defaultdict(dict)
+        routes = {}
+        rows = Route.objects.values_list(
+            "id", "source_id", "destination_id", "distance"
+        )
+        for route_id, source_id, destination_id, distance in rows.iterator():
+            edges[source_id][route_id] = (destination_id, distance)
+            incoming[destination_id][route_id] = (source_id, distance)
+            routes[route_id] = (source_id, destination_id, distance)
+        airports = {
+            airport_id: Airport.display_name(name, city)
+            for airport_id, name, city in Airport.objects.values_list(
+                "id", "name", "closest_big_city"
+            )
+        }
+        self.edges, self.incoming, self.routes, self.airports, self.version = (
+            edges,
+            incoming,
+            routes,
+            airports,
+            version,
+        )
+
+    def ensure_fresh(self):
+        version = catalog_version()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self.rebuild(version)
+
+    def apply_route(self, route, deleted=False, previous_version=None, version=None):
+        """Patch in one route saved or deleted by this process.
+
+        The index only moves to ``version`` when it was built at
+        ``previous_version``, the catalog version this bump replaced; any
+        other change in between (an airport, another worker's route) is left
+        for ensure_fresh to pick up with a rebuild.
+        """
+        if self.version is None:
+            return
+        with self._lock:
+            previous = self.routes.pop(route.id, None)
+            if previous is not None:
+                self.edges[previous[0]].pop(route.id, None)
+                self.incoming[previous[1]].pop(route.id, None)
+            if not deleted:
+                self.edges[route.source_id][route.id] = (
+                    route.destination_id,
+                    route.distance,
+                )
+                self.incoming[route.destination_id][route.id] = (
+                    route.source_id,
+                    route.distance,
+                )
+                self.routes[route.id] = (
+                    route.source_id,
+                    route.destination_id,
+                    route.distance,
+                )
+            if self.version == previous_version:
+                self.version = version
+
+    def paths(self, origin, destination, max_legs, limit=None):
+        """Return route id paths from origin to destination without revisiting airports.
+
+        Paths come fewest legs first. All but the last leg are walked out of
+        the origin and the last one is looked up in the destination's
+        in-edges, so the walk never goes deeper than ``max_legs - 1``. Once
+        ``limit`` paths are found the search stops, keeping the shortest
+        paths of the last leg count it reached.
+        """
+        into = defaultdict(list)
+        for route_id, (source_id, distance) in self.incoming.get(
+            destination, {}
+        ).items():
+            into[source_id].append((route_id, distance))
+
+        found = []
+        frontier = [((), origin, 0, (origin,))]
+        for leg_count in range(1, max_legs + 1):
+            level = [
+                (distance + last_distance, legs + (route_id,))
+                for legs, airport, distance, _ in frontier
+                for route_id, last_distance in into.get(airport, ())
+            ]
+            if limit is not None and len(found) + len(level) >= limit:
+                found.extend(heapq.nsmallest(limit - len(found), level))
+                break
+            found.extend(level)
+            if leg_count == max_legs:
+                break
+            # Before the last leg only airports with a route into the
+            # destination are worth walking to.
+            last_hop = leg_count + 1 == max_legs
+            next_frontier = []
+            for legs, airport, distance, visited in frontier:
+                for route_id, (next_airport, leg_distance) in self.edges.get(
+                    airport, {}
+                ).items():
+                    if next_airport == destination or next_airport in visited:
+                        continue
+                    if last_hop and next_airport not in into:
+                        continue
+                    next_frontier.append(
+                        (
+                            legs + (route_id,),
+                            next_airport,
+                            distance + leg_distance,
+                            visited + (next_airport,),
+                        )
+                    )
+            frontier = next_frontier
+        return [list(legs) for _, legs in found]
+
+
+route_graph = RouteGraph()
+
+
+def search_itineraries(
+    origin,
+    destination,
+    date_from,
+    date_to,
+    max_stops=2,
+    min_connection=timedelta(minutes=45),
+    max_connection=timedelta(hours=24),
+    ordering="duration",
+    limit=20,
+):
+    """Find direct, 1- and 2-stop connections departing within [date_from, date_to].
+
+    Candidate routes come from the in-memory graph (at most
+    MAX_CANDIDATE_PATHS paths, fewest legs and shortest first); all of their
+    flights in the search window are then fetched with a single query and
+    chained in memory.
+    """
+    route_graph.ensure_fresh()
+    paths = route_graph.paths(
+        origin, destination, max_legs=max_stops + 1, limit=MAX_CANDIDATE_PATHS
+    )
+    if not paths:
+        return []
+
+    route_info = {
+        route_id: route_graph.routes[route_id] for path in paths for route_id in path
+    }
+    window_start = timezone.make_aware(datetime.combine(date_from, time.min))
+    window_end = timezone.make_aware(datetime.combine(date_to, time.min)) + timedelta(
+        days=1
+    )
+    latest_departure = window_end + max_stops * (max_connection + timedelta(days=1))
+
+    departures = defaultdict(list)
+    flights = Flight.objects.filter(
+        route_id__in=route_info,
+        departure_time__gte=window_start,
+        departure_time__lt=latest_departure,
+    ).values_list("departure_time", "arrival_time", "id", "route_id")
+    for departure_time, arrival_time, flight_id, route_id in flights.order_by(
+        "departure_time"
+    ):
+        departures[route_id].append((departure_time, arrival_time, flight_id))
+    departure_keys = {
+        route_id: [flight[0] for flight in route_flights]
+        for route_id, route_flights in departures.items()
+    }
+
+    itineraries = []
+    for path in paths:
+        first_leg = [
+            flight for flight in departures.get(path[0], []) if flight[0] < window_end
+        ]
+        chains = [[flight] for flight in first_leg]
+        for route_id in path[1:]:
+            next_chains = []
+            route_flights = departures.get(route_id, [])
+            for chain in chains:
+                ready = chain[-1][1] + min_connection
+                index = bisect_left(departure_keys.get(route_id, []), ready)
+                for flight in route_flights[index:]:
+                    if flight[0] > chain[-1][1] + max_connection:
+                        break
+                    next_chains.append(chain + [flight])
+            chains = next_chains
+        distance = sum(route_info[route_id][2] for route_id in path)
+        for chain in chains:
+            itineraries.append((path, chain, distance))
+
+    def sort_key(itinerary):
+        path, chain, distance = itinerary
+        duration = chain[-1][1] - chain[0][0]
+        if ordering == "distance":
+            return distance, duration
+        return duration, distance
+
+    itineraries.sort(key=sort_key)
+    return [
+        _represent(path, chain, distance)
+        for path, chain, distance in itineraries[:limit]
+    ]
+
+
+def _represent(path, chain, distance):
+    legs = []
+    for route_id, (departure_time, arrival_time, flight_id) in zip(path, chain):
+        source_id, destination_id, _ = route_graph.routes[route_id]
+        legs.append(
+            {
+                "flight": flight_id,
+                "route_source": route_graph.airports.get(source_id),
+                "route_destination": route_graph.airports.get(destination_id),
+                "departure_time": departure_time,
+                "arrival_time": arrival_time,
+            }
+        )
+    duration = chain[-1][1] - chain[0][0]
+    return {
+        "stops": len(chain) - 1,
+        "departure_time": chain[0][0],
+        "arrival_time": chain[-1][1],
+        "duration_minutes": int(duration.total_seconds() // 60),
+        "distance": distance,
+        "legs": legs,
+    }
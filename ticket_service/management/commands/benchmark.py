@@ -0,0 +1,247 @@
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from ticket_service.models import Airplane, Flight, Order
+from ticket_service.synthetic import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset, time the search and booking hot paths through "
+        "the API and optionally compare the JSON results with a baseline run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--airports", type=int, default=200)
+        parser.add_argument("--routes", type=int, default=1000)
+        parser.add_argument("--airplanes", type=int, default=50)
+        parser.add_argument("--flights", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", help="Write results to this JSON file")
+        parser.add_argument(
+            "--baseline", help="JSON results of an earlier run to compare with"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed median slowdown as a fraction of the baseline",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Commit the seeded data instead of rolling back",
+        )
+
+    def _measure(self, name, request, expected_status, repeat):
+        timings = []
+        for iteration in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request(iteration)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != expected_status:
+                raise CommandError(
+                    f"{name}: expected {expected_status}, got {response.status_code}: "
+                    f"{response.content[:300]!r}"
+                )
+        timings.sort()
+        return {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(timings[0], 3),
+            "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)], 3),
+            "queries": len(queries),
+        }
+
+    def _cases(self, rng, repeat):
+        flight = Flight.objects.order_by("id")[rng.randrange(Flight.objects.count())]
+        search = (
+            f"/api/ticket_service/flights/?route__source={flight.route.source_id}"
+            f"&departure_time__date={flight.departure_time.date()}&page_size=20"
+        )
+        busiest = (
+            Order.objects.values("user")
+            .annotate(orders=Count("id"))
+            .order_by("-orders", "user")
+            .first()
+        )
+        if busiest is None:
+            raise CommandError(
+                "The seeded dataset has no orders to list; use more --flights or --users."
+            )
+        customer = get_user_model().objects.get(pk=busiest["user"])
+        staff = get_user_model().objects.create_user(
+            f"benchmark-staff-{rng.random()}@example.com", is_staff=True
+        )
+        # Bookings go to an empty flight so every iteration gets free seats.
+        airplane = Airplane.objects.create(
+            name="Benchmark",
+            rows=2 * repeat,
+            seats_on_row=10,
+            airplane_type=flight.airplane.airplane_type,
+        )
+        empty_flight = Flight.objects.create(
+            route=flight.route,
+            airplane=airplane,
+            departure_time=flight.departure_time + timedelta(days=365),
+            arrival_time=flight.arrival_time + timedelta(days=365),
+        )
+
+        anonymous = APIClient()
+        as_customer = APIClient()
+        as_customer.force_authenticate(customer)
+        as_staff = APIClient()
+        as_staff.force_authenticate(staff)
+
+        def seats(row):
+            return [
+                {"flight": empty_flight.id, "row": row, "seat": seat}
+                for seat in range(1, 6)
+            ]
+
+        return [
+            ("flight_search", lambda i: anonymous.get(search), 200),
+            (
+                "flight_detail",
+                lambda i: anonymous.get(f"/api/ticket_service/flights/{flight.id}/"),
+                200,
+            ),
+            (
+                "ticket_bulk_create",
+                lambda i: as_customer.post(
+                    "/api/ticket_service/tickets/", seats(2 * i + 1), format="json"
+                ),
+                201,
+            ),
+            (
+                "order_create",
+                lambda i: as_staff.post(
+                    "/api/ticket_service/orders/",
+                    {"tickets": seats(2 * i + 2)},
+                    format="json",
+                ),
+                201,
+            ),
+            (
+                "order_list",
+                lambda i: as_customer.get("/api/ticket_service/orders/?page_size=100"),
+                200,
+            ),
+        ]
+
+    def _compare(self, results, baseline, threshold):
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get("results", {}).get(name)
+            if previous is None:
+                continue
+            ratio = (
+                result["median_ms"] / previous["median_ms"]
+                if previous["median_ms"]
+                else 1
+            )
+            flags = []
+            if ratio > 1 + threshold:
+                flags.append(f"median x{ratio:.2f}")
+            if result["queries"] > previous["queries"]:
+                flags.append(f"queries {previous['queries']} -> {result['queries']}")
+            self.stdout.write(
+                f"{name:>20}: {previous['median_ms']:.2f} -> {result['median_ms']:.2f} ms"
+                + (f"  REGRESSION ({', '.join(flags)})" if flags else "")
+            )
+            if flags:
+                regressions.append(name)
+        return regressions
+
+    def handle(self, *args, **options):
+        # Every case needs a route, a flight with an airplane and a customer.
+        minimums = {
+            "airports": 2,
+            "routes": 1,
+            "airplanes": 1,
+            "flights": 1,
+            "users": 1,
+            "repeat": 1,
+        }
+        for option, minimum in minimums.items():
+            if options[option] < minimum:
+                raise CommandError(f"--{option} must be at least {minimum}.")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+
+        dataset_options = {
+            key: options[key]
+            for key in ("seed", "airports", "routes", "airplanes", "flights", "users")
+        }
+        overrides = {
+            "ALLOWED_HOSTS": ["*"],
+            "CACHES": {
+                **settings.CACHES,
+                settings.FLIGHT_CACHE_ALIAS: {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                },
+            },
+        }
+        results = {}
+        with (
+            transaction.atomic(),
+            override_settings(**overrides),
+            patch.object(APIView, "throttle_classes", []),
+        ):
+            started = time.perf_counter()
+            try:
+                counts = generate_dataset(**dataset_options)
+            except ValueError as error:
+                raise CommandError(error)
+            self.stdout.write(
+                f"Seeded {counts['tickets']} tickets on {counts['flights']} flights "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            rng = random.Random(options["seed"])
+            for name, request, expected_status in self._cases(rng, options["repeat"]):
+                results[name] = self._measure(
+                    name, request, expected_status, options["repeat"]
+                )
+                self.stdout.write(
+                    f"{name:>20}: median {results[name]['median_ms']:.2f} ms, "
+                    f"p95 {results[name]['p95_ms']:.2f} ms, {results[name]['queries']} queries"
+                )
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        report = {
+            "dataset": {**dataset_options, **counts},
+            "environment": {
+                "database": connection.vendor,
+                "python": platform.python_version(),
+            },
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output_file:
+                json.dump(report, output_file, indent=2)
+        if baseline is not None:
+            regressions = self._compare(results, baseline, options["threshold"])
+            if regressions:
+                raise CommandError(f"Regressions: {', '.join(regressions)}")
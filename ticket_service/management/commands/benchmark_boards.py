@@ -0,0 +1,63 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ticket_service.boards import board_cache_key, get_board
+from ticket_service.models import BoardEntry, Flight
+
+
+class Command(BaseCommand):
+    help = "Compare materialized board lookups with the live Flight/Route join"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _time(self, lookups, fetch):
+        started = time.perf_counter()
+        for airport_id, date in lookups:
+            fetch(airport_id, date)
+        return (time.perf_counter() - started) / len(lookups) * 1000
+
+    def handle(self, *args, **options):
+        days = list(
+            BoardEntry.objects.filter(direction=BoardEntry.DEPARTURE)
+            .values_list("airport_id", "date")
+            .distinct()
+        )
+        if not days:
+            self.stderr.write("No board entries; run rebuild_boards first.")
+            return
+        rng = random.Random(options["seed"])
+        lookups = [rng.choice(days) for _ in range(options["samples"])]
+
+        def live(airport_id, date):
+            start = timezone.make_aware(datetime.combine(date, datetime.min.time()))
+            return list(
+                Flight.objects.filter(
+                    route__source_id=airport_id,
+                    departure_time__gte=start,
+                    departure_time__lt=start + timedelta(days=1),
+                )
+                .select_related("airplane", "route__source", "route__destination")
+                .prefetch_related("crew")
+                .order_by("departure_time")
+            )
+
+        def board(airport_id, date):
+            return get_board(airport_id, date, BoardEntry.DEPARTURE)
+
+        cache.delete_many(
+            [board_cache_key(a, d, BoardEntry.DEPARTURE) for a, d in set(lookups)]
+        )
+        results = {
+            "live join": self._time(lookups, live),
+            "board (cold)": self._time(lookups, board),
+            "board (cached)": self._time(lookups, board),
+        }
+        for name, milliseconds in results.items():
+            self.stdout.write(f"{name:>15}: {milliseconds:.3f} ms/lookup")
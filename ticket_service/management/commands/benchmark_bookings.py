@@ -0,0 +1,127 @@
+import queue
+import statistics
+import threading
+import time
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from ticket_service.models import AirplaneType, Airplane, Airport, Route, Flight, Order
+from ticket_service.reservations import SeatsAlreadyTaken, reserve_seats
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent booking throughput against the configured database "
+        "(run once with DB_ENGINE=sqlite and once with DB_ENGINE=postgresql)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--bookings", type=int, default=500)
+        parser.add_argument(
+            "--flights", type=int, default=2, help="Flights the seats are spread over"
+        )
+
+    def _seed(self, options):
+        airplane_type = AirplaneType.objects.create(name="Booking benchmark")
+        seats_per_flight = -(-options["bookings"] // options["flights"])
+        airplane = Airplane.objects.create(
+            name="Booking benchmark",
+            rows=-(-seats_per_flight // 10),
+            seats_on_row=10,
+            airplane_type=airplane_type,
+        )
+        source = Airport.objects.create(name="Benchmark source")
+        destination = Airport.objects.create(name="Benchmark destination")
+        route = Route.objects.create(
+            source=source, destination=destination, distance=100
+        )
+        departure = timezone.make_aware(datetime(2035, 1, 1))
+        flights = [
+            Flight.objects.create(
+                airplane=airplane,
+                route=route,
+                departure_time=departure,
+                arrival_time=departure,
+            )
+            for _ in range(options["flights"])
+        ]
+        users = [
+            get_user_model().objects.create_user(
+                f"booking-benchmark-{index}@example.com", "benchmark"
+            )
+            for index in range(options["threads"])
+        ]
+        seats = queue.Queue()
+        for index in range(options["bookings"]):
+            flight = flights[index % len(flights)]
+            position = index // len(flights)
+            seats.put(
+                {"flight": flight, "row": position // 10 + 1, "seat": position % 10 + 1}
+            )
+        return airplane_type, [source, destination], users, seats
+
+    def _worker(self, user, seats, latencies, failures):
+        try:
+            while True:
+                try:
+                    seat = seats.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        order = Order.objects.create(user=user)
+                        reserve_seats(order, [seat], user=user)
+                except SeatsAlreadyTaken:
+                    failures.append("conflict")
+                except Exception as error:
+                    failures.append(type(error).__name__)
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        airplane_type, airports, users, seats = self._seed(options)
+        latencies, failures = [], []
+        workers = [
+            threading.Thread(
+                target=self._worker, args=(user, seats, latencies, failures)
+            )
+            for user in users
+        ]
+        started = time.perf_counter()
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            Order.objects.filter(user__in=users).delete()
+            for airport in airports:
+                airport.delete()
+            airplane_type.delete()
+            for user in users:
+                user.delete()
+
+        self.stdout.write(
+            f"{connection.vendor}: {options['threads']} threads, {elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"booked {len(latencies)}/{options['bookings']} "
+            f"({len(latencies) / elapsed:.1f} bookings/sec), failed {len(failures)}"
+        )
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms"
+            )
+        if failures:
+            self.stdout.write(f"failures: {sorted(set(failures))}")
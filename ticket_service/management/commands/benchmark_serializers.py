@@ -0,0 +1,126 @@
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ticket_service.models import (
+    AirplaneType,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    Ticket,
+    Order,
+)
+from ticket_service.serializers import (
+    FlightListSerializer,
+    TicketListSerializer,
+    OrderListSerializer,
+)
+from ticket_service.values_serializers import (
+    FlightListValuesSerializer,
+    TicketListValuesSerializer,
+    OrderListValuesSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ModelSerializer and values()-based list rendering times on "
+        "synthetic rows (rolled back afterwards); ValuesSerializerContractTests "
+        "checks both produce identical JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def _seed(self, count):
+        airplane_type = AirplaneType.objects.create(name="Benchmark")
+        airplane = Airplane.objects.create(
+            name="Benchmark", rows=100, seats_on_row=10, airplane_type=airplane_type
+        )
+        source = Airport.objects.create(name="Source", closest_big_city="City")
+        destination = Airport.objects.create(name="Destination")
+        route = Route.objects.create(
+            source=source, destination=destination, distance=500
+        )
+        user = get_user_model().objects.create_user(
+            "benchmark@example.com", "benchmark"
+        )
+        start = timezone.make_aware(datetime(2030, 1, 1))
+        flights = Flight.objects.bulk_create(
+            Flight(
+                airplane=airplane,
+                route=route,
+                departure_time=start + timedelta(minutes=index),
+                arrival_time=start + timedelta(minutes=index, hours=2),
+            )
+            for index in range(count)
+        )
+        orders = Order.objects.bulk_create(Order(user=user) for _ in range(count))
+        seats = airplane.rows * airplane.seats_on_row
+        Ticket.objects.bulk_create(
+            Ticket(
+                flight=flights[index // seats],
+                row=index % seats // airplane.seats_on_row + 1,
+                seat=index % airplane.seats_on_row + 1,
+                order=order,
+                user=user,
+            )
+            for index, order in enumerate(orders)
+        )
+        flight_ids = [flight.id for flight in flights]
+        return {
+            "flights": (
+                Flight.objects.filter(id__in=flight_ids)
+                .select_related("airplane", "route__source", "route__destination")
+                .with_tickets_available()
+                .order_by("departure_time", "id"),
+                FlightListSerializer,
+                FlightListValuesSerializer,
+            ),
+            "tickets": (
+                Ticket.objects.filter(flight_id__in=flight_ids).order_by("id"),
+                TicketListSerializer,
+                TicketListValuesSerializer,
+            ),
+            "orders": (
+                Order.objects.filter(user=user).select_related("user").order_by("id"),
+                OrderListSerializer,
+                OrderListValuesSerializer,
+            ),
+        }
+
+    def _time(self, render, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, data
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for name, (queryset, serializer_class, values_serializer) in self._seed(
+                options["objects"]
+            ).items():
+                model_ms, _ = self._time(
+                    lambda: serializer_class(queryset.all(), many=True).data,
+                    options["repeat"],
+                )
+                values_ms, values_data = self._time(
+                    lambda: values_serializer.serialize(
+                        values_serializer.prepare(queryset.all())
+                    ),
+                    options["repeat"],
+                )
+                self.stdout.write(
+                    f"{name:>8}: {len(values_data)} rows, serializer {model_ms:.1f} ms, "
+                    f"values {values_ms:.1f} ms ({model_ms / values_ms:.1f}x)"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,45 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket_service.schedule_import import (
+    ScheduleImporter,
+    read_schedule,
+    schedule_format,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or NDJSON flight schedule into the database in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"])
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-errors", type=int, default=50, help="Error lines to print"
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or schedule_format(options["path"])
+        importer = ScheduleImporter(batch_size=options["batch_size"])
+        try:
+            with open(options["path"], encoding="utf-8", newline="") as stream:
+                report = importer.run(read_schedule(stream, fmt))
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            if importer.created:
+                raise CommandError(
+                    f"{error}. Batches are committed as they go: {importer.created} "
+                    f"flights up to line {importer.last_imported_line} were imported."
+                )
+            raise CommandError(f"{error}. Nothing was imported.")
+
+        for error in report["errors"][: options["max_errors"]]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']}/{report['processed']} flights "
+                f"in {report['seconds']}s ({report['rows_per_second']} rows/sec), "
+                f"{report['failed']} failed"
+            )
+        )
@@ -0,0 +1,108 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from ticket_service.models import Flight
+from ticket_service.views import FlightList
+
+ENDPOINTS = {
+    "list": "flights/?page_size=20",
+    "detail": "flights/{id}/",
+    "seats": "flights/{id}/seats/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the sync (WSGI) and async (ASGI) flight endpoints in-process at "
+        "the given concurrency and compare throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument(
+            "--threads", type=int, default=8, help="WSGI worker threads"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _urls(self, prefix, endpoint, flight_ids, count, rng):
+        template = f"/api/ticket_service/{prefix}{ENDPOINTS[endpoint]}"
+        return [template.format(id=rng.choice(flight_ids)) for _ in range(count)]
+
+    def _run_sync(self, urls, threads):
+        local = threading.local()
+
+        def fetch(url):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            return local.client.get(url).status_code
+
+        def close_connections(_):
+            connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(fetch, urls))
+            list(pool.map(close_connections, range(threads)))
+        return statuses
+
+    async def _run_async(self, urls, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                return (await client.get(url)).status_code
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+    def _report(self, name, statuses, elapsed):
+        failed = sum(status != 200 for status in statuses)
+        self.stdout.write(
+            f"{name:>14}: {len(statuses) / elapsed:8.1f} req/s "
+            f"({elapsed:.2f}s, {failed} non-200)"
+        )
+
+    def handle(self, *args, **options):
+        flight_ids = list(Flight.objects.values_list("id", flat=True)[:1000])
+        if not flight_ids:
+            raise CommandError("No flights to request; seed some data first.")
+        rng = random.Random(options["seed"])
+        overrides = {
+            "ALLOWED_HOSTS": ["*"],
+            # Measure the views themselves rather than response cache hits.
+            "CACHES": {
+                **settings.CACHES,
+                settings.FLIGHT_CACHE_ALIAS: {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                },
+            },
+        }
+        # Throttle classes are bound on the view class at import time.
+        with override_settings(**overrides), patch.object(
+            FlightList, "throttle_classes", []
+        ):
+            for endpoint in ENDPOINTS:
+                urls = self._urls("", endpoint, flight_ids, options["requests"], rng)
+                started = time.perf_counter()
+                statuses = self._run_sync(urls, options["threads"])
+                self._report(
+                    f"{endpoint} wsgi", statuses, time.perf_counter() - started
+                )
+
+                urls = self._urls(
+                    "async/", endpoint, flight_ids, options["requests"], rng
+                )
+                started = time.perf_counter()
+                statuses = asyncio.run(self._run_async(urls, options["concurrency"]))
+                self._report(
+                    f"{endpoint} asgi", statuses, time.perf_counter() - started
+                )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from ticket_service.boards import refresh_boards
+from ticket_service.models import Flight
+
+
+class Command(BaseCommand):
+    help = "Re-materialize departure/arrival board rows for every flight"
+
+    def handle(self, *args, **options):
+        created = refresh_boards(Flight.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"Materialized {created} board entries"))
@@ -0,0 +1,66 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket_service.synthetic import DEFAULT_START, SCALES, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset (airports, routes, fleet, flights, "
+        "orders and tickets) with bulk inserts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+        parser.add_argument("--seed", type=int, default=0)
+        for option in ("airports", "routes", "airplanes", "flights", "users"):
+            parser.add_argument(
+                f"--{option}", type=int, help=f"Override the scale's {option}"
+            )
+        parser.add_argument(
+            "--load-factor", type=float, default=0.8, help="Mean share of seats sold"
+        )
+        parser.add_argument("--days", type=int, default=30, help="Days of departures")
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=DEFAULT_START,
+            help=f"First departure day (default: {DEFAULT_START})",
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options["scale"]])
+        sizes.update({key: options[key] for key in sizes if options[key] is not None})
+        started = time.perf_counter()
+
+        def progress(counts):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{counts['flights']}/{sizes['flights']} flights, {counts['tickets']} tickets "
+                f"({counts['tickets'] / elapsed:.0f} tickets/sec)"
+            )
+
+        try:
+            counts = generate_dataset(
+                seed=options["seed"],
+                load_factor=options["load_factor"],
+                days=options["days"],
+                start=options["start"],
+                batch_size=options["batch_size"],
+                progress=progress,
+                **sizes,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded in {time.perf_counter() - started:.1f}s: "
+                + ", ".join(f"{count} {model}" for model, count in counts.items())
+            )
+        )
+        self.stdout.write(
+            "Run rebuild_boards to materialize departure boards for the new flights."
+        )
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ticket_service.reservations import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and sweep every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            swept = sweep_expired_holds()
+            self.stdout.write(f"Swept {swept} expired seat hold(s)")
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
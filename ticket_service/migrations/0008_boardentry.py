@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket_service", "0007_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[("departure", "Departure"), ("arrival", "Arrival")],
+                        max_length=9,
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("scheduled_time", models.DateTimeField()),
+                ("counterpart", models.CharField(max_length=255)),
+                ("airplane", models.CharField(max_length=100)),
+                (
+                    "airport",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="board_entries",
+                        to="ticket_service.airport",
+                    ),
+                ),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="board_entries",
+                        to="ticket_service.flight",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["scheduled_time"],
+                "indexes": [
+                    models.Index(
+                        fields=["airport", "direction", "date", "scheduled_time"],
+                        name="board_airport_day_idx",
+                    )
+                ],
+                "unique_together": {("flight", "direction")},
+            },
+        ),
+    ]
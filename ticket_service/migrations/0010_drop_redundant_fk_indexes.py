@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket_service", "0009_flightschedule"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="flight",
+            name="route",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="ticket_service.route",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="route",
+            name="source",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="departure",
+                to="ticket_service.airport",
+            ),
+        ),
+    ]
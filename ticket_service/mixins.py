@@ -0,0 +1,161 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return if_none_match.strip() == "*" or etag in parse_etags(if_none_match)
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(
+        request.headers.get("If-Modified-Since", "")
+    )
+    return (
+        if_modified_since is not None
+        and int(last_modified.timestamp()) <= if_modified_since
+    )
+
+
+class ConditionalGetMixin:
+    """Answer list/retrieve GETs with validators and 304 Not Modified.
+
+    The ETag is derived from a watermark of the rows in the response - row
+    count, max id, max of ``watermark_fields`` and the count and max id of
+    each ``watermark_relations`` child - which one aggregate query computes
+    without loading or serializing any rows. ``watermark_fields`` should
+    reach every nested row the payload renders; child counts catch rows
+    removed from a relation. Paginated lists only watermark the requested
+    page, whose keys one more bounded query fetches, together with the
+    page's links so that rows appended after a full last page show up.
+    """
+
+    conditional_actions = ["list", "retrieve"]
+    watermark_fields = ("updated_at",)
+    watermark_relations = ()
+    cache_control = "private, no-cache"
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def get_watermark_queryset(self):
+        self.page_marker = None
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        elif self.paginator is not None:
+            # Aggregating the whole filtered queryset would scan the table on
+            # every page request.
+            page = self.paginate_queryset(queryset.values(*self._page_fields(queryset)))
+            if page is not None:
+                page_ids = [row["pk"] for row in page]
+                self.page_marker = (
+                    page_ids,
+                    self.paginator.get_next_link(),
+                    self.paginator.get_previous_link(),
+                )
+                queryset = queryset.filter(pk__in=page_ids)
+        return queryset
+
+    def _page_fields(self, queryset):
+        """Primary key plus the columns cursor pagination reads positions from."""
+        get_ordering = getattr(self.paginator, "get_ordering", None)
+        if get_ordering is None:
+            return ["pk"]
+        ordering = get_ordering(self.request, queryset, self)
+        return ["pk", *(field.lstrip("-") for field in ordering)]
+
+    def get_validators(self):
+        """Return ``(etag, last_modified)`` for this request, or None to skip."""
+        aggregates = {"total": Count("id", distinct=True), "last_id": Max("id")}
+        for index, field in enumerate(self.watermark_fields):
+            aggregates[f"watermark_{index}"] = Max(field)
+        for index, relation in enumerate(self.watermark_relations):
+            aggregates[f"children_{index}"] = Count(relation, distinct=True)
+            aggregates[f"last_child_{index}"] = Max(f"{relation}__id")
+        watermark = self.get_watermark_queryset().order_by().aggregate(**aggregates)
+        if self.action == "retrieve" and not watermark["total"]:
+            return None
+
+        stamps = [
+            watermark[f"watermark_{index}"]
+            for index in range(len(self.watermark_fields))
+        ]
+        fingerprint = "|".join(
+            str(value)
+            for value in [
+                self.request.get_full_path(),
+                self.request.user.pk,
+                self.page_marker,
+                *watermark.values(),
+            ]
+        )
+        etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+        return etag, max((stamp for stamp in stamps if stamp is not None), default=None)
+
+    def render_response(self, request, render, etag, *args, **kwargs):
+        return render(request, *args, **kwargs)
+
+    def conditional_response(self, request, render, *args, **kwargs):
+        validators = (
+            self.get_validators() if self.action in self.conditional_actions else None
+        )
+        if validators is None:
+            return render(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        if is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.render_response(request, render, etag, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        response["Cache-Control"] = self.cache_control
+        return response
+
+
+class ValuesListMixin:
+    """Render ``list`` through ``values_serializer_class`` when one is set.
+
+    The queryset is projected with ``values()`` so no model instances are
+    built; ordering columns are kept in the rows because cursor pagination
+    reads its position from them. Leave ``values_serializer_class`` as None
+    to fall back to the regular serializer.
+    """
+
+    values_serializer_class = None
+
+    def _ordering_columns(self, queryset):
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return [
+            field.lstrip("-")
+            for field in (*queryset.query.order_by, *ordering)
+            if isinstance(field, str)
+        ]
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.values_serializer_class
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = values_serializer.prepare(queryset, self._ordering_columns(queryset))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(queryset))
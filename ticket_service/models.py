@@ -1,4 +1,7 @@
+from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
@@ -7,6 +10,7 @@ User = get_user_model()
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=100, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name or 'Unnamed type'}"
@@ -16,6 +20,7 @@ class Airplane(models.Model):
     rows = models.IntegerField(null=False, blank=False)
     seats_on_row = models.IntegerField(null=False, blank=False)
     airplane_type = models.ForeignKey(AirplaneType, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
     @property
@@ -29,23 +34,38 @@ class Airplane(models.Model):
 class Airport(models.Model):
     name = models.CharField(max_length=100, null=False, blank=False)
     closest_big_city = models.CharField(max_length=100, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def display_name(name, closest_big_city):
+        if closest_big_city:
+            return f"{name} Airport ({closest_big_city})"
+        return f"{name} Airport"
 
     def __str__(self):
-        if self.closest_big_city:
-            return f"{self.name} Airport ({self.closest_big_city})"
-        return f"{self.name} Airport"
+        return self.display_name(self.name, self.closest_big_city)
 
 class Route(models.Model):
-    source = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="departure")
+    # Indexed as the leading column of route_source_destination_idx.
+    source = models.ForeignKey(
+        Airport, on_delete=models.CASCADE, related_name="departure", db_index=False
+    )
     destination = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="arrival")
     distance = models.IntegerField(null=False, blank=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.source.name} → {self.destination.name} ({self.distance} km)"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["source", "destination"], name="route_source_destination_idx"),
+        ]
+
 class Crew(models.Model):
     first_name = models.CharField(max_length=100, null=False, blank=False)
     last_name = models.CharField(max_length=100, null=False, blank=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def full_name(self):
@@ -54,22 +74,92 @@ class Crew(models.Model):
     def __str__(self):
         return self.full_name
 
+def _count_per_flight(queryset):
+    return models.Subquery(
+        queryset.filter(flight=models.OuterRef("pk"))
+        .order_by()
+        .values("flight")
+        .annotate(count=models.Count("id"))
+        .values("count"),
+        output_field=models.IntegerField(),
+    )
+
+
+class FlightQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        return self.annotate(
+            tickets_available=(
+                models.F("airplane__rows") * models.F("airplane__seats_on_row")
+                - Coalesce(_count_per_flight(Ticket.objects.all()), 0)
+                - Coalesce(_count_per_flight(SeatHold.objects.live()), 0)
+            )
+        )
+
+
+class FlightSchedule(models.Model):
+    """Recurring flight template; occurrences become Flights when first booked."""
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedules")
+    airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE, related_name="schedules")
+    crew = models.ManyToManyField(Crew, blank=True, related_name="schedules")
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    weekdays = models.CharField(
+        max_length=7,
+        default="1111111",
+        validators=[RegexValidator(r"^[01]{7}$", "Use seven 0/1 flags, Monday first.")],
+        help_text="Seven 0/1 flags, Monday first, e.g. 1010100 for Mon/Wed/Fri",
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def runs_on(self, date):
+        return self.valid_from <= date <= self.valid_until and self.weekdays[date.weekday()] == "1"
+
+    def __str__(self):
+        return f"{self.route} | {self.departure_time:%H:%M} ({self.weekdays})"
+
+
 class Flight(models.Model):
     airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE)
-    route = models.ForeignKey(Route, on_delete=models.CASCADE)
+    # Indexed as the leading column of flight_route_departure_idx.
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, db_index=False)
     crew = models.ManyToManyField(Crew)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FlightQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.route} | {self.departure_time.strftime('%Y-%m-%d %H:%M')}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["route", "departure_time"], name="flight_route_departure_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="flight_schedule_occurrence_unique",
+            ),
+        ]
+
 class Ticket(models.Model):
     row = models.IntegerField(null=False, blank=False)
     seat = models.IntegerField(null=False, blank=False)
     flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="tickets")
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     order = models.ForeignKey("Order", on_delete=models.CASCADE, related_name="tickets")
+    updated_at = models.DateTimeField(auto_now=True)
 
     @staticmethod
     def validate_ticket(row, seat, flight, error_to_raise):
@@ -119,7 +209,62 @@ class Ticket(models.Model):
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
     def __str__(self):
         return f"Order #{self.id} by {self.user.email} on {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField(null=False, blank=False)
+    seat = models.IntegerField(null=False, blank=False)
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="seat_holds")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="seat_holds")
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Hold: flight {self.flight_id}, seat {self.row}{chr(64 + self.seat)} until {self.expires_at:%H:%M:%S}"
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ["row", "seat"]
+
+
+class BoardEntry(models.Model):
+    """Denormalized departure/arrival board row, maintained by ticket_service.boards."""
+
+    DEPARTURE = "departure"
+    ARRIVAL = "arrival"
+    DIRECTION_CHOICES = [(DEPARTURE, "Departure"), (ARRIVAL, "Arrival")]
+
+    airport = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="board_entries")
+    direction = models.CharField(max_length=9, choices=DIRECTION_CHOICES)
+    date = models.DateField()
+    scheduled_time = models.DateTimeField()
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="board_entries")
+    counterpart = models.CharField(max_length=255)
+    airplane = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f"{self.get_direction_display()} {self.airport_id} {self.scheduled_time:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        unique_together = ("flight", "direction")
+        ordering = ["scheduled_time"]
+        indexes = [
+            models.Index(
+                fields=["airport", "direction", "date", "scheduled_time"],
+                name="board_airport_day_idx",
+            ),
+        ]
@@ -0,0 +1,221 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from ticket_service.cache import invalidate_availability
+from ticket_service.models import Flight, Order, SeatHold, Ticket
+from ticket_service.seat_feed import SEAT_TAKEN, publish_seats
+from ticket_service.seat_map import invalidate_seat_map
+
+
+class SeatsAlreadyTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats):
+        self.seats = sorted(seats)
+        # Assigned directly: APIException.__init__ would coerce the ids to strings.
+        self.detail = {
+            "detail": self.default_detail,
+            "taken_seats": [
+                {"flight": flight_id, "row": row, "seat": seat}
+                for flight_id, row, seat in self.seats
+            ],
+        }
+
+
+class HoldsExpired(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seat holds have expired or do not exist."
+    default_code = "holds_expired"
+
+    def __init__(self, hold_ids):
+        self.hold_ids = sorted(hold_ids)
+        self.detail = {"detail": self.default_detail, "holds": self.hold_ids}
+
+
+def seat_keys(seats):
+    return {(item["flight"].id, item["row"], item["seat"]) for item in seats}
+
+
+def _existing_keys(queryset, keys):
+    if not keys:
+        return set()
+    existing = queryset.filter(
+        flight_id__in={flight_id for flight_id, _, _ in keys},
+        row__in={row for _, row, _ in keys},
+        seat__in={seat for _, _, seat in keys},
+    ).values_list("flight_id", "row", "seat")
+    return keys.intersection(existing.order_by())
+
+
+def taken_seats(keys):
+    """Return the subset of (flight_id, row, seat) keys that already have tickets."""
+    return _existing_keys(Ticket.objects.all(), keys)
+
+
+def held_seats(keys, exclude_user=None):
+    """Return the subset of keys covered by live holds of anyone but ``exclude_user``."""
+    holds = SeatHold.objects.live()
+    if exclude_user is not None:
+        holds = holds.exclude(user=exclude_user)
+    return _existing_keys(holds, keys)
+
+
+def _lock_flights(keys):
+    flight_ids = sorted({flight_id for flight_id, _, _ in keys})
+    list(
+        Flight.objects.select_for_update()
+        .filter(id__in=flight_ids)
+        .order_by("id")
+        .values_list("id")
+    )
+    return flight_ids
+
+
+def _availability_changed(flight_ids):
+    invalidate_seat_map(*flight_ids)
+    invalidate_availability(*flight_ids)
+
+
+def _user_holds(user, keys):
+    """The user's holds on exactly the given (flight_id, row, seat) keys."""
+    candidates = SeatHold.objects.filter(
+        user=user,
+        flight_id__in={flight_id for flight_id, _, _ in keys},
+        row__in={row for _, row, _ in keys},
+        seat__in={seat for _, _, seat in keys},
+    ).values_list("id", "flight_id", "row", "seat")
+    hold_ids = [
+        hold_id
+        for hold_id, flight_id, row, seat in candidates.order_by()
+        if (flight_id, row, seat) in keys
+    ]
+    return SeatHold.objects.filter(id__in=hold_ids)
+
+
+@transaction.atomic
+def reserve_seats(order, seats, user=None):
+    """Atomically create tickets in ``order`` for every requested seat.
+
+    ``seats`` is an iterable of dicts with ``flight``, ``row`` and ``seat``
+    keys, as produced by TicketCreateSerializer. The flights are locked in
+    id order so concurrent bookings for the same flight serialize, and the
+    (flight, row, seat) unique constraint is the final arbiter on backends
+    without row locks. Seats under a live hold of another user count as
+    taken; the booking user's own holds on them are consumed. Either every
+    seat is booked or SeatsAlreadyTaken is raised listing the conflicting ones.
+    """
+    seats = list(seats)
+    keys = seat_keys(seats)
+    flight_ids = _lock_flights(keys)
+
+    conflicts = taken_seats(keys) | held_seats(keys, exclude_user=user)
+    if conflicts:
+        raise SeatsAlreadyTaken(conflicts)
+
+    tickets = [
+        Ticket(
+            order=order,
+            user=user,
+            flight=item["flight"],
+            row=item["row"],
+            seat=item["seat"],
+        )
+        for item in seats
+    ]
+    try:
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create(tickets)
+    except IntegrityError:
+        raise SeatsAlreadyTaken(taken_seats(keys) or keys)
+    if user is not None:
+        _user_holds(user, keys).delete()
+
+    transaction.on_commit(lambda: _availability_changed(flight_ids))
+    transaction.on_commit(lambda: publish_seats(SEAT_TAKEN, keys))
+    return tickets
+
+
+@transaction.atomic
+def hold_seats(user, seats):
+    """Hold the requested seats for ``user`` for settings.SEAT_HOLD_TTL seconds.
+
+    Re-holding seats the user already holds extends their expiry.
+    """
+    seats = list(seats)
+    keys = seat_keys(seats)
+    flight_ids = _lock_flights(keys)
+
+    conflicts = taken_seats(keys) | held_seats(keys, exclude_user=user)
+    if conflicts:
+        raise SeatsAlreadyTaken(conflicts)
+
+    # Expired holds of other users still occupy the unique slot until swept.
+    SeatHold.objects.expired().filter(flight_id__in=flight_ids).delete()
+    _user_holds(user, keys).delete()
+
+    expires_at = timezone.now() + timedelta(seconds=settings.SEAT_HOLD_TTL)
+    holds = [
+        SeatHold(
+            user=user,
+            flight=item["flight"],
+            row=item["row"],
+            seat=item["seat"],
+            expires_at=expires_at,
+        )
+        for item in seats
+    ]
+    try:
+        with transaction.atomic():
+            holds = SeatHold.objects.bulk_create(holds)
+    except IntegrityError:
+        raise SeatsAlreadyTaken(held_seats(keys, exclude_user=user) or keys)
+
+    transaction.on_commit(lambda: _availability_changed(flight_ids))
+    return holds
+
+
+@transaction.atomic
+def confirm_holds(user, hold_ids):
+    """Turn the user's live holds into tickets of a new order."""
+    hold_ids = set(hold_ids)
+    holds = list(
+        SeatHold.objects.live()
+        .select_for_update()
+        .select_related("flight")
+        .filter(user=user, id__in=hold_ids)
+    )
+    missing = hold_ids - {hold.id for hold in holds}
+    if missing:
+        raise HoldsExpired(missing)
+
+    order = Order.objects.create(user=user)
+    return reserve_seats(
+        order,
+        [{"flight": hold.flight, "row": hold.row, "seat": hold.seat} for hold in holds],
+        user=user,
+    )
+
+
+@transaction.atomic
+def release_holds(user, hold_ids):
+    holds = SeatHold.objects.filter(user=user, id__in=hold_ids)
+    flight_ids = set(holds.values_list("flight_id", flat=True))
+    released, _ = holds.delete()
+    transaction.on_commit(lambda: _availability_changed(flight_ids))
+    return released
+
+
+def sweep_expired_holds():
+    """Delete every expired hold with one DELETE; return how many were removed."""
+    expired = SeatHold.objects.expired()
+    flight_ids = set(expired.values_list("flight_id", flat=True).distinct())
+    swept, _ = expired.delete()
+    _availability_changed(flight_ids)
+    return swept
@@ -0,0 +1,240 @@
+import codecs
+import csv
+import io
+import json
+import time
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ticket_service.boards import refresh_boards
+from ticket_service.cache import invalidate_flights
+from ticket_service.models import Airplane, Airport, Crew, Flight, Route
+
+SCHEDULE_FIELDS = (
+    "source",
+    "destination",
+    "airplane",
+    "departure_time",
+    "arrival_time",
+    "crew",
+)
+
+
+class RowError(Exception):
+    pass
+
+
+def read_schedule(stream, fmt):
+    """Yield ``(line_number, row_dict)`` from a CSV or NDJSON text stream lazily."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as error:
+                yield line_number, error
+    else:
+        raise ValueError(f"Unsupported schedule format: {fmt}")
+
+
+def _unique_lookup(pairs):
+    """Map natural key -> id, with None marking keys shared by several rows."""
+    lookup = {}
+    for key, pk in pairs:
+        lookup[key] = None if key in lookup else pk
+    return lookup
+
+
+class ScheduleImporter:
+    """Stream schedule rows into Flight and its crew through table with bulk_create.
+
+    Airports, airplanes and crew are resolved by name (crew by "First Last")
+    from lookup tables loaded once; routes by (source, destination) airport.
+    Invalid rows are reported and skipped, the rest of the batch is written.
+    Each batch commits on its own; ``last_imported_line`` is the last line of
+    the latest committed batch, so a stream that breaks part-way can say how
+    far the import got.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.airports = _unique_lookup(Airport.objects.values_list("name", "id"))
+        self.routes = _unique_lookup(
+            ((source_id, destination_id), route_id)
+            for route_id, source_id, destination_id in Route.objects.values_list(
+                "id", "source_id", "destination_id"
+            )
+        )
+        self.airplanes = _unique_lookup(Airplane.objects.values_list("name", "id"))
+        self.crew = _unique_lookup(
+            (f"{first_name} {last_name}", crew_id)
+            for crew_id, first_name, last_name in Crew.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        )
+        self.created = 0
+        self.processed = 0
+        self.last_imported_line = None
+        self.errors = []
+        self.started = None
+
+    def _resolve(self, lookup, key, label):
+        if key not in lookup:
+            raise RowError(f"Unknown {label}: {key}")
+        if lookup[key] is None:
+            raise RowError(f"Ambiguous {label}: {key}")
+        return lookup[key]
+
+    @staticmethod
+    def _text(row, field):
+        value = row[field]
+        if not isinstance(value, str):
+            raise RowError(f"Invalid {field}: expected a string, got {value!r}")
+        return value.strip()
+
+    def _parse_time(self, row, field):
+        value = self._text(row, field)
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise RowError(f"Invalid {field}: {value!r}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def build_flight(self, row):
+        if isinstance(row, Exception):
+            raise RowError(f"Malformed row: {row}")
+        if not isinstance(row, dict):
+            raise RowError(f"Malformed row: expected an object, got {row!r}")
+        missing = [field for field in SCHEDULE_FIELDS[:5] if not row.get(field)]
+        if missing:
+            raise RowError(f"Missing fields: {', '.join(missing)}")
+
+        source_id = self._resolve(self.airports, self._text(row, "source"), "airport")
+        destination_id = self._resolve(
+            self.airports, self._text(row, "destination"), "airport"
+        )
+        route_id = self._resolve(self.routes, (source_id, destination_id), "route")
+        airplane_id = self._resolve(
+            self.airplanes, self._text(row, "airplane"), "airplane"
+        )
+        departure_time = self._parse_time(row, "departure_time")
+        arrival_time = self._parse_time(row, "arrival_time")
+        if arrival_time <= departure_time:
+            raise RowError("arrival_time must be after departure_time")
+
+        crew = row.get("crew") or []
+        if isinstance(crew, str):
+            crew = crew.split(";")
+        if not isinstance(crew, list) or not all(
+            isinstance(name, str) for name in crew
+        ):
+            raise RowError(f"Invalid crew: {crew!r}")
+        crew_ids = {
+            self._resolve(self.crew, name.strip(), "crew member")
+            for name in crew
+            if name.strip()
+        }
+
+        flight = Flight(
+            route_id=route_id,
+            airplane_id=airplane_id,
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+        )
+        return flight, crew_ids
+
+    @transaction.atomic
+    def _write(self, batch):
+        flights = Flight.objects.bulk_create([flight for _, flight, _ in batch])
+        Flight.crew.through.objects.bulk_create(
+            [
+                Flight.crew.through(flight_id=flight.id, crew_id=crew_id)
+                for flight, (_, _, crew_ids) in zip(flights, batch)
+                for crew_id in crew_ids
+            ]
+        )
+        refresh_boards(Flight.objects.filter(id__in=[flight.id for flight in flights]))
+        return len(flights)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.created += self._write(batch)
+            self.last_imported_line = batch[-1][0]
+        except DatabaseError as error:
+            self.errors.extend(
+                (line_number, f"Batch failed: {error}") for line_number, _, _ in batch
+            )
+        batch.clear()
+
+    def run(self, rows):
+        self.started = time.perf_counter()
+        batch = []
+        try:
+            for line_number, row in rows:
+                self.processed += 1
+                try:
+                    flight, crew_ids = self.build_flight(row)
+                except RowError as error:
+                    self.errors.append((line_number, str(error)))
+                    continue
+                batch.append((line_number, flight, crew_ids))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+            self._flush(batch)
+        finally:
+            # Committed batches stay even when reading the stream fails.
+            if self.created:
+                invalidate_flights()
+        return self.report()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started if self.started else 0.0
+
+    def report(self):
+        elapsed = self.elapsed
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": [{"line": line, "error": error} for line, error in self.errors],
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.processed / elapsed, 1) if elapsed else None,
+        }
+
+
+def schedule_format(filename, default="csv"):
+    if filename.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    if filename.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def check_utf8(uploaded_file):
+    """Raise UnicodeDecodeError for a non-UTF-8 upload before any row is written."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in uploaded_file.chunks():
+        decoder.decode(chunk)
+    decoder.decode(b"", final=True)
+    uploaded_file.seek(0)
+
+
+def import_uploaded_schedule(uploaded_file, fmt=None, batch_size=1000):
+    fmt = fmt or schedule_format(uploaded_file.name)
+    check_utf8(uploaded_file)
+    stream = io.TextIOWrapper(uploaded_file.file, encoding="utf-8", newline="")
+    return ScheduleImporter(batch_size=batch_size).run(read_schedule(stream, fmt))
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ticket_service.models import Flight, Order
+from ticket_service.reservations import reserve_seats
+
+
+def occurrence_departure(schedule, date):
+    return timezone.make_aware(datetime.combine(date, schedule.departure_time))
+
+
+def expand_schedules(schedules, date_from, date_to):
+    """Generate occurrences of ``schedules`` between two dates without touching Flight rows.
+
+    Already materialized occurrences are matched with one query and carry
+    their flight id and live availability; the others report full capacity.
+    """
+    schedules = list(
+        schedules.filter(
+            valid_from__lte=date_to, valid_until__gte=date_from
+        ).select_related("airplane", "route__source", "route__destination")
+    )
+    materialized = {
+        (flight.schedule_id, flight.departure_time): flight
+        for flight in Flight.objects.with_tickets_available().filter(
+            schedule__in=schedules,
+            departure_time__gte=timezone.make_aware(
+                datetime.combine(date_from, datetime.min.time())
+            ),
+            departure_time__lt=timezone.make_aware(
+                datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+            ),
+        )
+    }
+
+    occurrences = []
+    day = date_from
+    while day <= date_to:
+        for schedule in schedules:
+            if not schedule.runs_on(day):
+                continue
+            departure_time = occurrence_departure(schedule, day)
+            flight = materialized.get((schedule.id, departure_time))
+            occurrences.append(
+                {
+                    "schedule": schedule.id,
+                    "date": day,
+                    "flight": flight.id if flight else None,
+                    "route_source": str(schedule.route.source),
+                    "route_destination": str(schedule.route.destination),
+                    "airplane_name": schedule.airplane.name,
+                    "departure_time": departure_time,
+                    "arrival_time": departure_time + schedule.duration,
+                    "tickets_available": (
+                        flight.tickets_available
+                        if flight
+                        else schedule.airplane.capacity
+                    ),
+                }
+            )
+        day += timedelta(days=1)
+    occurrences.sort(key=lambda occurrence: occurrence["departure_time"])
+    return occurrences
+
+
+@transaction.atomic
+def materialize(schedule, date):
+    """Return the Flight for ``schedule`` on ``date``, creating it on first use."""
+    departure_time = occurrence_departure(schedule, date)
+    flight, created = Flight.objects.get_or_create(
+        schedule=schedule,
+        departure_time=departure_time,
+        defaults={
+            "route_id": schedule.route_id,
+            "airplane_id": schedule.airplane_id,
+            "arrival_time": departure_time + schedule.duration,
+        },
+    )
+    if created:
+        flight.crew.set(schedule.crew.all())
+    return flight
+
+
+@transaction.atomic
+def book_occurrence(schedule, date, seats, user):
+    """Book seats on a schedule occurrence, materializing its Flight if needed.
+
+    A failed reservation rolls the materialized Flight back as well.
+    """
+    flight = materialize(schedule, date)
+    order = Order.objects.create(user=user)
+    return reserve_seats(
+        order,
+        [
+            {"flight": flight, "row": seat["row"], "seat": seat["seat"]}
+            for seat in seats
+        ],
+        user=user,
+    )
@@ -0,0 +1,111 @@
+"""Push seat-taken / seat-released deltas to clients watching a flight.
+
+Writers call ``publish_seats`` once per committed change; the configured
+SEAT_FEED_BACKEND fans each event out to every subscriber of that flight,
+so watchers cost a queue put rather than a database poll. The default
+backend is in-process: it reaches watchers served by the same ASGI worker,
+and a cross-process backend (e.g. Redis pub/sub) can implement the same
+``publish`` / ``subscribe`` pair.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SEAT_TAKEN = "seat-taken"
+SEAT_RELEASED = "seat-released"
+RESYNC = "resync"
+
+
+class Subscription:
+    """Registered watcher of one flight; iterate it for ``(event, data)`` pairs.
+
+    It is registered on creation, so nothing published after that is
+    missed; ``close()`` unregisters it.
+    """
+
+    def __init__(self, feed, flight_id):
+        self.feed = feed
+        self.flight_id = flight_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=feed.max_pending)
+        self.lagged = False
+
+    def deliver(self, event):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow reader gets one resync instead of an unbounded backlog.
+            self.lagged = True
+            self.queue.get_nowait()
+            self.queue.put_nowait((RESYNC, {}))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event[0] == RESYNC:
+            self.lagged = False
+        return event
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+
+class InProcessSeatFeed:
+    """Thread-safe fan-out of flight events to asyncio subscribers."""
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscriber_count(self, flight_id):
+        return len(self._subscribers.get(flight_id, ()))
+
+    def publish(self, flight_id, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(flight_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, (event, data))
+            except RuntimeError:
+                # The subscriber's event loop has closed; it unsubscribes itself.
+                pass
+
+    def subscribe(self, flight_id):
+        """Return a Subscription for ``flight_id``; call from a running event loop."""
+        subscription = Subscription(self, flight_id)
+        with self._lock:
+            self._subscribers[flight_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.flight_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.flight_id]
+
+
+@cache
+def seat_feed():
+    return import_string(settings.SEAT_FEED_BACKEND)()
+
+
+def publish_seats(event, seats):
+    """Publish ``event`` for each ``(flight_id, row, seat)``, batched per flight."""
+    by_flight = defaultdict(list)
+    for flight_id, row, seat in seats:
+        by_flight[flight_id].append({"row": row, "seat": seat})
+    feed = seat_feed()
+    for flight_id, flight_seats in by_flight.items():
+        feed.publish(flight_id, event, {"seats": flight_seats})
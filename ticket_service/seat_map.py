@@ -0,0 +1,158 @@
+import base64
+import logging
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from ticket_service.models import Flight, SeatHold, Ticket
+
+logger = logging.getLogger(__name__)
+
+SEAT_MAP_CACHE_TIMEOUT = 60 * 5
+
+
+def seat_map_cache_key(flight_id):
+    return f"ticket_service:seat_map:{flight_id}"
+
+
+class SeatMap:
+    """Occupancy of an airplane's rows x seats_on_row grid packed into bits.
+
+    Seat (row, seat) maps to bit ``(row - 1) * seats_on_row + (seat - 1)``,
+    most significant bit first, so a 60x10 wide-body fits in 75 bytes.
+    Seats under a live hold are marked as taken; ``expires_at`` is the
+    earliest moment one of those holds lapses.
+    """
+
+    def __init__(self, rows, seats_on_row, bitmap=None, expires_at=None):
+        self.rows = rows
+        self.seats_on_row = seats_on_row
+        self.bitmap = bytearray(bitmap or (rows * seats_on_row + 7) // 8)
+        self.expires_at = expires_at
+
+    @staticmethod
+    def _taken(flight):
+        return (
+            Ticket.objects.filter(flight=flight).values_list("row", "seat").order_by()
+        )
+
+    @staticmethod
+    def _held(flight):
+        return (
+            SeatHold.objects.live()
+            .filter(flight=flight)
+            .values_list("row", "seat", "expires_at")
+            .order_by()
+        )
+
+    def _hold(self, row, seat, expires_at):
+        self.take(row, seat)
+        if self.expires_at is None or expires_at < self.expires_at:
+            self.expires_at = expires_at
+
+    @classmethod
+    def for_flight(cls, flight):
+        seat_map = cls(flight.airplane.rows, flight.airplane.seats_on_row)
+        for row, seat in cls._taken(flight):
+            seat_map.take(row, seat)
+        for row, seat, expires_at in cls._held(flight):
+            seat_map._hold(row, seat, expires_at)
+        return seat_map
+
+    @classmethod
+    async def afor_flight(cls, flight_id, rows, seats_on_row):
+        """Async counterpart of for_flight for a flight known only by id."""
+        seat_map = cls(rows, seats_on_row)
+        async for row, seat in cls._taken(flight_id):
+            seat_map.take(row, seat)
+        async for row, seat, expires_at in cls._held(flight_id):
+            seat_map._hold(row, seat, expires_at)
+        return seat_map
+
+    def _position(self, row, seat):
+        index = (row - 1) * self.seats_on_row + (seat - 1)
+        return index // 8, 0x80 >> (index % 8)
+
+    def take(self, row, seat):
+        if not (1 <= row <= self.rows and 1 <= seat <= self.seats_on_row):
+            # Tickets sold before the airplane's layout shrank have no bit.
+            logger.warning(
+                "Seat %s/%s is outside the %sx%s seat map",
+                row,
+                seat,
+                self.rows,
+                self.seats_on_row,
+            )
+            return
+        byte, mask = self._position(row, seat)
+        self.bitmap[byte] |= mask
+
+    def is_taken(self, row, seat):
+        byte, mask = self._position(row, seat)
+        return bool(self.bitmap[byte] & mask)
+
+    @property
+    def taken_count(self):
+        return sum(bin(byte).count("1") for byte in self.bitmap)
+
+    def grid(self):
+        return [
+            "".join(
+                "X" if self.is_taken(row, seat) else "."
+                for seat in range(1, self.seats_on_row + 1)
+            )
+            for row in range(1, self.rows + 1)
+        ]
+
+    def to_representation(self, grid=False):
+        data = {
+            "rows": self.rows,
+            "seats_on_row": self.seats_on_row,
+            "tickets_taken": self.taken_count,
+            "tickets_available": self.rows * self.seats_on_row - self.taken_count,
+            "bitmap": base64.b64encode(bytes(self.bitmap)).decode(),
+        }
+        if grid:
+            data["grid"] = self.grid()
+        return data
+
+
+def _cache_entry(seat_map):
+    timeout = SEAT_MAP_CACHE_TIMEOUT
+    if seat_map.expires_at is not None:
+        until_hold_expires = (seat_map.expires_at - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(until_hold_expires) + 1))
+    return (seat_map.rows, seat_map.seats_on_row, bytes(seat_map.bitmap)), timeout
+
+
+def get_seat_map(flight):
+    key = seat_map_cache_key(flight.id)
+    cached = cache.get(key)
+    if cached is not None:
+        return SeatMap(*cached)
+    seat_map = SeatMap.for_flight(flight)
+    cache.set(key, *_cache_entry(seat_map))
+    return seat_map
+
+
+async def aget_seat_map(flight_id):
+    """Async get_seat_map by flight id; None if there is no such flight."""
+    key = seat_map_cache_key(flight_id)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return SeatMap(*cached)
+    try:
+        airplane = await Flight.objects.values(
+            "airplane__rows", "airplane__seats_on_row"
+        ).aget(pk=flight_id)
+    except Flight.DoesNotExist:
+        return None
+    seat_map = await SeatMap.afor_flight(
+        flight_id, airplane["airplane__rows"], airplane["airplane__seats_on_row"]
+    )
+    await cache.aset(key, *_cache_entry(seat_map))
+    return seat_map
+
+
+def invalidate_seat_map(*flight_ids):
+    cache.delete_many([seat_map_cache_key(flight_id) for flight_id in flight_ids])
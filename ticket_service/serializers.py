@@ -1,8 +1,20 @@
+from datetime import timedelta
+
 from django.db import transaction
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
 
-from ticket_service.models import AirplaneType, Airplane, Airport, Route, Crew, Flight, Ticket, Order
+from ticket_service.models import (AirplaneType,
+                                   Airplane,
+                                   Airport,
+                                   Route,
+                                   Crew,
+                                   Flight,
+                                   Ticket,
+                                   Order,
+                                   SeatHold,
+                                   BoardEntry,
+                                   FlightSchedule)
+from ticket_service.reservations import reserve_seats
 from user.serializers import UserSerializer, UserListSerializer
 
 
@@ -88,20 +100,111 @@ class FlightSerializer(serializers.ModelSerializer):
         flight.crew.set(crew)
         return flight
 
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    crew = CrewDetailSerializer(many=True, read_only=True)
+    crew_id = serializers.PrimaryKeyRelatedField(
+        queryset=Crew.objects.all(),
+        many=True,
+        write_only=True,
+        required=False,
+    )
+
+    class Meta:
+        model = FlightSchedule
+        fields = ["id",
+                  "route",
+                  "airplane",
+                  "departure_time",
+                  "duration",
+                  "weekdays",
+                  "valid_from",
+                  "valid_until",
+                  "crew",
+                  "crew_id"]
+
+    def validate(self, attrs):
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get("valid_until", getattr(self.instance, "valid_until", None))
+        if valid_from and valid_until and valid_until < valid_from:
+            raise serializers.ValidationError("valid_until must not be before valid_from")
+        return attrs
+
+    def create(self, validated_data):
+        crew = validated_data.pop("crew_id", [])
+        schedule = FlightSchedule.objects.create(**validated_data)
+        schedule.crew.set(crew)
+        return schedule
+
+    def update(self, instance, validated_data):
+        crew = validated_data.pop("crew_id", None)
+        schedule = super().update(instance, validated_data)
+        if crew is not None:
+            schedule.crew.set(crew)
+        return schedule
+
+
+class OccurrenceQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField(required=False)
+    source = serializers.IntegerField(required=False)
+    destination = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", attrs["date_from"])
+        if attrs["date_to"] < attrs["date_from"]:
+            raise serializers.ValidationError("date_to must not be before date_from")
+        if attrs["date_to"] - attrs["date_from"] > timedelta(days=31):
+            raise serializers.ValidationError("The date window is limited to 31 days")
+        return attrs
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class ScheduleBookingSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    tickets = SeatSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        schedule = self.context["schedule"]
+        if not schedule.runs_on(attrs["date"]):
+            raise serializers.ValidationError({"date": "The schedule does not run on this date"})
+        airplane = schedule.airplane
+        seats = set()
+        for ticket in attrs["tickets"]:
+            if ticket["row"] > airplane.rows:
+                raise serializers.ValidationError("Choose a valid row")
+            if ticket["seat"] > airplane.seats_on_row:
+                raise serializers.ValidationError("Choose a valid seat")
+            key = (ticket["row"], ticket["seat"])
+            if key in seats:
+                raise serializers.ValidationError(f"Duplicate ticket: row {key[0]}, seat {key[1]}")
+            seats.add(key)
+        return attrs
+
+
 class FlightListSerializer(FlightSerializer):
     airplane_name =serializers.CharField(source="airplane.name", read_only=True)
     route_source = serializers.CharField(source="route.source", read_only=True)
     route_destination = serializers.CharField(source="route.destination", read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Flight
-        fields = ["airplane_name", "route_source", "route_destination", "departure_time", "arrival_time"]
+        fields = ["airplane_name",
+                  "route_source",
+                  "route_destination",
+                  "departure_time",
+                  "arrival_time",
+                  "tickets_available"]
 
 
 class FlightDetailSerializer(FlightSerializer):
     route_source = serializers.CharField(source="route.source", read_only=True)
     route_destination = serializers.CharField(source="route.destination", read_only=True)
-    tickets_available = serializers.SerializerMethodField(read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
     class Meta:
         model = Flight
         fields = ("airplane",
@@ -112,11 +215,35 @@ class FlightDetailSerializer(FlightSerializer):
                   "tickets_available",
                   "crew",)
 
-    @staticmethod
-    def get_tickets_available(self, obj):
-        taken_tickets = obj.tickets.count()
-        capacity = obj.airplane.capacity
-        return capacity - taken_tickets
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    origin = serializers.PrimaryKeyRelatedField(queryset=Airport.objects.all())
+    destination = serializers.PrimaryKeyRelatedField(queryset=Airport.objects.all())
+    date_from = serializers.DateField()
+    date_to = serializers.DateField(required=False)
+    max_stops = serializers.IntegerField(min_value=0, max_value=2, default=2)
+    min_connection = serializers.IntegerField(min_value=0, default=45, help_text="Minutes")
+    max_connection = serializers.IntegerField(min_value=1, default=24 * 60, help_text="Minutes")
+    ordering = serializers.ChoiceField(choices=["duration", "distance"], default="duration")
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", attrs["date_from"])
+        if attrs["date_to"] < attrs["date_from"]:
+            raise serializers.ValidationError("date_to must not be before date_from")
+        if attrs["date_to"] - attrs["date_from"] > timedelta(days=7):
+            raise serializers.ValidationError("The date window is limited to 7 days")
+        if attrs["origin"] == attrs["destination"]:
+            raise serializers.ValidationError("origin and destination must differ")
+        return attrs
+
+
+class BoardQuerySerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+    direction = serializers.ChoiceField(
+        choices=[BoardEntry.DEPARTURE, BoardEntry.ARRIVAL],
+        default=BoardEntry.DEPARTURE,
+    )
 
 
 class TicketListSerializer(serializers.ModelSerializer):
@@ -125,46 +252,88 @@ class TicketListSerializer(serializers.ModelSerializer):
         fields = ("id", "row", "seat", "flight")
 
 
+class TicketFlightSerializer(FlightListSerializer):
+    class Meta:
+        model = Flight
+        fields = ["airplane_name", "route_source", "route_destination", "departure_time", "arrival_time"]
+
+
 class TicketDetailSerializer(TicketListSerializer):
-    flight = FlightListSerializer()
+    flight = TicketFlightSerializer()
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
 
-class TicketListCreateSerializer(serializers.ListSerializer):
-    def validate(self, data):
-        flight = None
-        seats = set()
-        for item in data:
-            row = item["row"]
-            seat = item["seat"]
-            flight = item["flight"]
-            key = (row, seat)
+class FlightPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve flights from the batch preloaded by TicketListCreateSerializer."""
 
-            if key in seats:
-                raise serializers.ValidationError(f"Duplicate ticket: row {row}, seat {seat}")
-            seats.add(key)
+    def to_internal_value(self, data):
+        flights = getattr(self.parent, "preloaded_flights", None)
+        if flights is not None:
+            try:
+                return flights[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
 
-            if Ticket.objects.filter(row=row, seat=seat, flight=flight).exists():
-                raise serializers.ValidationError(f'Ticket already exists: row {row}, seat {seat}')
-            Ticket.validate_ticket(row, seat, flight, serializers.ValidationError)
 
+class TicketListCreateSerializer(serializers.ListSerializer):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        flight_ids = set()
+        if isinstance(data, list):
+            for item in data:
+                try:
+                    flight_ids.add(int(item["flight"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        self.child.preloaded_flights = (
+            Flight.objects.select_related("airplane").in_bulk(flight_ids)
+        )
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child.preloaded_flights = None
+
+    def validate(self, data):
+        requested = set()
+        duplicates = []
+        for item in data:
+            key = (item["flight"].id, item["row"], item["seat"])
+            if key in requested:
+                duplicates.append(key)
+            requested.add(key)
+
+        if duplicates:
+            raise serializers.ValidationError(
+                {
+                    "duplicate_seats": [
+                        {"flight": flight_id, "row": row, "seat": seat}
+                        for flight_id, row, seat in duplicates
+                    ]
+                }
+            )
         return data
 
     @transaction.atomic
     def create(self, validated_data):
         user = self.context["request"].user
-        order, _ = Order.objects.get_or_create(user=user)
-
-        tickets = [Ticket(order=order, **item) for item in validated_data]
-        return Ticket.objects.bulk_create(tickets)
+        order = Order.objects.create(user=user)
+        return reserve_seats(order, validated_data, user=user)
 
 
 class TicketCreateSerializer(serializers.ModelSerializer):
+    flight = FlightPrimaryKeyRelatedField(queryset=Flight.objects.select_related("airplane"))
+
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
         list_serializer_class = TicketListCreateSerializer
+        # Seat uniqueness is enforced by reserve_seats().
+        validators = []
 
     def validate(self, attrs):
 
@@ -180,41 +349,41 @@ class TicketCreateSerializer(serializers.ModelSerializer):
             flight=attrs["flight"],
             error_to_raise=serializers.ValidationError
         )
-        Ticket.validate_ticket(attrs["row"], attrs["seat"], attrs["flight"], serializers.ValidationError)
-        if Ticket.objects.filter(row=attrs["row"], seat=attrs["seat"], flight=attrs["flight"]).exists():
-            raise ValidationError("Ticket already exists")
+        # Taken seats are detected under lock by reserve_seats() and reported as 409.
         return attrs
 
     @transaction.atomic
     def create(self, validated_data):
         user = self.context["request"].user
-        order, _ = Order.objects.get_or_create(user=user)
-
-        ticket = Ticket.objects.create(
-            order=order,
-            **validated_data,
-        )
+        order = Order.objects.create(user=user)
+        ticket, = reserve_seats(order, [validated_data], user=user)
         return ticket
 
 
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "row", "seat", "flight", "expires_at")
+
+
+class SeatHoldActionSerializer(serializers.Serializer):
+    holds = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     tickets = TicketCreateSerializer(many=True)
     class Meta:
         model = Order
         fields = ("id", "tickets", "user", "created_at")
+        read_only_fields = ("user",)
 
     @transaction.atomic
     def create(self, validated_data):
         user = self.context["request"].user
         tickets_data = validated_data.pop("tickets")
+        validated_data.pop("user", None)
         order = Order.objects.create(**validated_data, user=user)
-        for ticket_data in tickets_data:
-            Ticket.objects.create(
-                user=user,
-                order=order,
-                **ticket_data
-            )
-
+        reserve_seats(order, tickets_data, user=user)
         return order
 
 class OrderListSerializer(serializers.ModelSerializer):
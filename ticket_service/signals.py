@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from ticket_service.boards import (
+    forget_flight_boards,
+    refresh_boards,
+    refresh_flight_boards,
+)
+from ticket_service.cache import (
+    catalog_version,
+    invalidate_availability,
+    invalidate_catalog,
+    invalidate_flights,
+)
+from ticket_service.itineraries import route_graph
+from ticket_service.models import Airplane, Airport, Crew, Flight, Route, Ticket
+from ticket_service.seat_feed import SEAT_RELEASED, SEAT_TAKEN, publish_seats
+from ticket_service.seat_map import invalidate_seat_map
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    invalidate_seat_map(instance.flight_id)
+    invalidate_availability(instance.flight_id)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved_feed(sender, instance, created, **kwargs):
+    if created:
+        seat = (instance.flight_id, instance.row, instance.seat)
+        transaction.on_commit(lambda: publish_seats(SEAT_TAKEN, [seat]))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted_feed(sender, instance, **kwargs):
+    seat = (instance.flight_id, instance.row, instance.seat)
+    transaction.on_commit(lambda: publish_seats(SEAT_RELEASED, [seat]))
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def flight_changed(sender, instance, **kwargs):
+    invalidate_seat_map(instance.id)
+    invalidate_flights(instance.id)
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_saved_seat_maps(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_seat_map(
+            *Flight.objects.filter(airplane=instance).values_list("id", flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def flight_crew_changed(sender, instance, **kwargs):
+    if isinstance(instance, Flight):
+        invalidate_flights(instance.id)
+    else:
+        invalidate_catalog()
+
+
+@receiver([post_save, post_delete], sender=Route)
+def route_changed(sender, instance, signal, **kwargs):
+    previous_version = catalog_version()
+    version = invalidate_catalog()
+    route_graph.apply_route(
+        instance,
+        deleted=signal is post_delete,
+        previous_version=previous_version,
+        version=version,
+    )
+
+
+@receiver([post_save, post_delete], sender=Airport)
+@receiver([post_save, post_delete], sender=Airplane)
+@receiver([post_save, post_delete], sender=Crew)
+def catalog_changed(sender, instance, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved_board(sender, instance, **kwargs):
+    refresh_flight_boards(instance.id)
+
+
+@receiver(pre_delete, sender=Flight)
+def flight_deleted_board(sender, instance, **kwargs):
+    forget_flight_boards(instance)
+
+
+@receiver(post_save, sender=Route)
+def route_saved_board(sender, instance, created, **kwargs):
+    if not created:
+        refresh_boards(Flight.objects.filter(route=instance))
+
+
+@receiver(post_save, sender=Airport)
+def airport_saved_board(sender, instance, created, **kwargs):
+    if not created:
+        refresh_boards(
+            Flight.objects.filter(
+                Q(route__source=instance) | Q(route__destination=instance)
+            )
+        )
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_saved_board(sender, instance, created, **kwargs):
+    if not created:
+        refresh_boards(Flight.objects.filter(airplane=instance))
@@ -0,0 +1,320 @@
+"""Deterministic synthetic datasets for benchmarks and load tests.
+
+Everything is derived from ``seed`` and ``start`` and written in
+batches with bulk_create, or a raw executemany for tickets, so neither
+Model.save() nor the per-row Ticket.full_clean() runs and memory stays flat
+however many tickets are made.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ticket_service.cache import invalidate_catalog
+from ticket_service.models import (
+    AirplaneType,
+    Airplane,
+    Airport,
+    Route,
+    Crew,
+    Flight,
+    Ticket,
+    Order,
+)
+
+# First departure day unless ``start`` is given, so a seed always yields the
+# same dataset whatever day it is run.
+DEFAULT_START = date(2030, 1, 1)
+
+# Airplane type name -> (rows, seats_on_row) layouts of that family.
+AIRPLANE_FAMILIES = {
+    "Turboprop": ((12, 4), (18, 4)),
+    "Regional jet": ((20, 4), (25, 4), (19, 5)),
+    "Narrow-body": ((25, 6), (30, 6), (33, 6), (38, 6)),
+    "Wide-body": ((35, 8), (40, 9), (45, 9)),
+    "Jumbo": ((50, 10), (60, 10)),
+}
+
+SCALES = {
+    "small": {
+        "airports": 200,
+        "routes": 2_000,
+        "airplanes": 50,
+        "flights": 2_000,
+        "users": 500,
+    },
+    "medium": {
+        "airports": 1_000,
+        "routes": 20_000,
+        "airplanes": 400,
+        "flights": 50_000,
+        "users": 20_000,
+    },
+    "large": {
+        "airports": 4_000,
+        "routes": 120_000,
+        "airplanes": 2_000,
+        "flights": 500_000,
+        "users": 500_000,
+    },
+}
+
+
+def _bulk(model, objects, batch_size):
+    return model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def _hub_weights(count):
+    # A few hubs carry most routes, as in real networks.
+    return [1 / (rank + 1) ** 0.8 for rank in range(count)]
+
+
+def _load_factor(rng, mean):
+    # Beta around ``mean`` gives mostly-full flights with a long tail of empty ones.
+    # Both shape parameters must be positive, so 0 and 1 are taken literally.
+    if mean <= 0 or mean >= 1:
+        return mean
+    concentration = 8
+    return rng.betavariate(mean * concentration, (1 - mean) * concentration)
+
+
+def _catalog(rng, prefix, airports, routes, airplanes, batch_size):
+    airplane_types = _bulk(
+        AirplaneType,
+        [AirplaneType(name=f"{prefix} {family}") for family in AIRPLANE_FAMILIES],
+        batch_size,
+    )
+    fleet = []
+    for index in range(airplanes):
+        airplane_type = rng.choice(airplane_types)
+        rows, seats_on_row = rng.choice(
+            AIRPLANE_FAMILIES[airplane_type.name[len(prefix) + 1 :]]
+        )
+        fleet.append(
+            Airplane(
+                name=f"{prefix} airplane {index}",
+                rows=rows,
+                seats_on_row=seats_on_row,
+                airplane_type=airplane_type,
+            )
+        )
+    fleet = _bulk(Airplane, fleet, batch_size)
+    airport_objects = _bulk(
+        Airport,
+        [
+            Airport(
+                name=f"{prefix} {index:05d}", closest_big_city=f"City {index % 997}"
+            )
+            for index in range(airports)
+        ],
+        batch_size,
+    )
+    weights = _hub_weights(airports)
+    pairs = set()
+    target = min(routes, airports * (airports - 1))
+    while len(pairs) < target:
+        source, destination = rng.choices(range(airports), weights, k=2)
+        if source != destination:
+            pairs.add((source, destination))
+    route_objects = _bulk(
+        Route,
+        [
+            Route(
+                source=airport_objects[source],
+                destination=airport_objects[destination],
+                distance=rng.randint(150, 12_000),
+            )
+            for source, destination in sorted(pairs)
+        ],
+        batch_size,
+    )
+    crew = _bulk(
+        Crew,
+        [
+            Crew(first_name=f"Crew{index}", last_name=prefix)
+            for index in range(max(10, airplanes * 3))
+        ],
+        batch_size,
+    )
+    return airplane_types, fleet, airport_objects, route_objects, crew
+
+
+def _flights_chunk(rng, count, route_objects, fleet, crew, start, days, batch_size):
+    flights = []
+    for _ in range(count):
+        route = rng.choice(route_objects)
+        departure = start + timedelta(minutes=rng.randrange(days * 24 * 12) * 5)
+        flights.append(
+            Flight(
+                route=route,
+                airplane=rng.choice(fleet),
+                departure_time=departure,
+                arrival_time=departure + timedelta(minutes=30 + route.distance // 12),
+            )
+        )
+    flights = _bulk(Flight, flights, batch_size)
+    _bulk(
+        Flight.crew.through,
+        [
+            Flight.crew.through(flight_id=flight.id, crew_id=member.id)
+            for flight in flights
+            for member in rng.sample(crew, 3)
+        ],
+        batch_size,
+    )
+    return flights
+
+
+def _insert_tickets(rows):
+    """executemany an INSERT of ``(row, seat, flight_id, user_id, order_id)`` tuples.
+
+    Building a Ticket instance per row is what dominates bulk_create at this
+    volume, so tickets skip the model layer entirely.
+    """
+    fields = [
+        Ticket._meta.get_field(name)
+        for name in ("row", "seat", "flight", "user", "order", "updated_at")
+    ]
+    quote = connection.ops.quote_name
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(Ticket._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(*row, updated_at) for row in rows])
+    return len(rows)
+
+
+def _bookings_chunk(rng, flights, users, load_factor, batch_size):
+    """Book each flight to a sampled load factor in orders of 1-4 seats."""
+    groups = []
+    for flight in flights:
+        airplane = flight.airplane
+        capacity = airplane.rows * airplane.seats_on_row
+        positions = rng.sample(
+            range(capacity), round(capacity * _load_factor(rng, load_factor))
+        )
+        index = 0
+        while index < len(positions):
+            size = rng.randint(1, 4)
+            groups.append((flight, rng.choice(users), positions[index : index + size]))
+            index += size
+    orders = _bulk(Order, [Order(user=user) for _, user, _ in groups], batch_size)
+    tickets = 0
+    batch = []
+    for order, (flight, user, positions) in zip(orders, groups):
+        seats_on_row = flight.airplane.seats_on_row
+        for position in positions:
+            batch.append(
+                (
+                    position // seats_on_row + 1,
+                    position % seats_on_row + 1,
+                    flight.id,
+                    user.id,
+                    order.id,
+                )
+            )
+        if len(batch) >= batch_size:
+            tickets += _insert_tickets(batch)
+            batch = []
+    if batch:
+        tickets += _insert_tickets(batch)
+    return len(orders), tickets
+
+
+def generate_dataset(
+    seed=0,
+    airports=200,
+    routes=2_000,
+    airplanes=50,
+    flights=2_000,
+    users=500,
+    load_factor=0.8,
+    days=30,
+    start=None,
+    batch_size=5_000,
+    progress=None,
+):
+    """Create the dataset and return the number of rows written per model.
+
+    Flights and their bookings are written ``batch_size`` flights at a time,
+    each chunk in its own transaction; ``progress(counts)`` is called after
+    every chunk. ``load_factor`` is clamped to [0, 1]. A seed can be seeded
+    only once per database, as its users' emails are unique; ValueError is
+    raised when they already exist.
+    """
+    rng = random.Random(seed)
+    prefix = f"synthetic-{seed}"
+    load_factor = min(max(load_factor, 0.0), 1.0)
+    if get_user_model().objects.filter(email__startswith=f"{prefix}-").exists():
+        raise ValueError(
+            f"The dataset for seed {seed} already exists; pick another seed "
+            "or flush the database first."
+        )
+    start = timezone.make_aware(
+        datetime.combine(start or DEFAULT_START, datetime.min.time())
+    )
+
+    with transaction.atomic():
+        airplane_types, fleet, airport_objects, route_objects, crew = _catalog(
+            rng, prefix, airports, routes, airplanes, batch_size
+        )
+        password = make_password(None)
+        user_objects = _bulk(
+            get_user_model(),
+            [
+                get_user_model()(
+                    email=f"{prefix}-{index}@example.com", password=password
+                )
+                for index in range(users)
+            ],
+            batch_size,
+        )
+    counts = {
+        "airplane_types": len(airplane_types),
+        "airplanes": len(fleet),
+        "airports": len(airport_objects),
+        "routes": len(route_objects),
+        "crew": len(crew),
+        "users": len(user_objects),
+        "flights": 0,
+        "orders": 0,
+        "tickets": 0,
+    }
+
+    # Keep each chunk's ticket count near batch_size * 20 whatever the fleet.
+    mean_capacity = sum(
+        airplane.rows * airplane.seats_on_row for airplane in fleet
+    ) / len(fleet)
+    chunk = max(
+        1, min(flights, int(batch_size * 20 / (mean_capacity * load_factor or 1)))
+    )
+    while counts["flights"] < flights:
+        with transaction.atomic():
+            created = _flights_chunk(
+                rng,
+                min(chunk, flights - counts["flights"]),
+                route_objects,
+                fleet,
+                crew,
+                start,
+                days,
+                batch_size,
+            )
+            orders, tickets = _bookings_chunk(
+                rng, created, user_objects, load_factor, batch_size
+            )
+        counts["flights"] += len(created)
+        counts["orders"] += orders
+        counts["tickets"] += tickets
+        if progress is not None:
+            progress(counts)
+
+    transaction.on_commit(invalidate_catalog)
+    return counts
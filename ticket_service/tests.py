@@ -1,3 +1,981 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from ticket_service.boards import board_cache_key, get_board
+from ticket_service.db_router import ReplicaRouter, _current_request, primary_pin_key
+from ticket_service.filters import FlightFilter
+from ticket_service.instrumentation import registry
+from ticket_service.itineraries import RouteGraph
+from ticket_service.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    BoardEntry,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+from ticket_service.schedule_import import SCHEDULE_FIELDS
+from ticket_service.synthetic import DEFAULT_START
+from ticket_service.throttling import TokenBucketThrottle, parse_rate
+from ticket_service.views import FlightList, OrderViewSet, TicketList
+from user.authentication import user_cache_key
+
+DEPARTURE = datetime(2030, 1, 1, 8, tzinfo=timezone.utc)
+
+
+def create_flights(count, rows=10, seats_on_row=6):
+    airplane_type = AirplaneType.objects.create(name="Narrow-body")
+    airplane = Airplane.objects.create(
+        name="A320", rows=rows, seats_on_row=seats_on_row, airplane_type=airplane_type
+    )
+    crew = [Crew.objects.create(first_name="Crew", last_name=str(i)) for i in range(3)]
+    flights = []
+    for i in range(count):
+        route = Route.objects.create(
+            source=Airport.objects.create(name=f"Source {i}", closest_big_city="City"),
+            destination=Airport.objects.create(name=f"Destination {i}"),
+            distance=500 + i,
+        )
+        flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=DEPARTURE + timedelta(hours=i),
+            arrival_time=DEPARTURE + timedelta(hours=i + 2),
+        )
+        flight.crew.set(crew)
+        flights.append(flight)
+    return flights
+
+
+class ApiTestMixin:
+    """Starts every test with empty response, throttle and user caches."""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = APIClient()
+
+    def count_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.captured_queries = queries.captured_queries
+        return response, len(queries)
+
+
+class ApiTestCase(ApiTestMixin, TestCase):
+    pass
+
+
+class ApiTransactionTestCase(ApiTestMixin, TransactionTestCase):
+    pass
+
+
+class FlightQueryCountTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flights = create_flights(20)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        url = reverse("ticket_service:flights-list")
+        counts = {}
+        for page_size in (2, 10, 20):
+            response, counts[page_size] = self.count_queries(
+                "get", url, data={"page_size": page_size}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), page_size)
+        self.assertEqual(counts, {2: 1, 10: 1, 20: 1})
+
+    def test_retrieve_query_count(self):
+        for flight in self.flights[:3]:
+            url = reverse("ticket_service:flights-detail", args=[flight.id])
+            response, count = self.count_queries("get", url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["crew"]), 3)
+            self.assertEqual(count, 2)
+
+
+class SeatMapTests(ApiTestCase):
+    def test_airplane_layout_change_rebuilds_the_seat_map(self):
+        flight = create_flights(1)[0]
+        user = get_user_model().objects.create_user("buyer@example.com", "secret")
+        Ticket.objects.create(
+            order=Order.objects.create(user=user),
+            user=user,
+            flight=flight,
+            row=10,
+            seat=6,
+        )
+        url = reverse("ticket_service:flights-seats", args=[flight.id])
+        self.assertEqual(self.client.get(url).data["tickets_taken"], 1)
+
+        flight.airplane.rows = 5
+        flight.airplane.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["rows"], 5)
+        self.assertEqual(response.data["tickets_taken"], 0)
+
+
+class TicketBatchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        self.user = get_user_model().objects.create_user("buyer@example.com", "secret")
+        self.client.force_authenticate(self.user)
+
+    def test_empty_batches_are_rejected(self):
+        for name in ("tickets-list", "tickets-hold"):
+            response = self.client.post(
+                reverse(f"ticket_service:{name}"), [], format="json"
+            )
+            self.assertEqual(response.status_code, 400, name)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_batch_query_count_does_not_depend_on_size(self):
+        url = reverse("ticket_service:tickets-list")
+        counts = []
+        for rows in (range(1, 2), range(2, 5)):
+            payload = [
+                {"flight": self.flight.id, "row": row, "seat": seat}
+                for row in rows
+                for seat in range(1, 7)
+            ]
+            response, count = self.count_queries(
+                "post", url, data=payload, format="json"
+            )
+            self.assertEqual(response.status_code, 201)
+            counts.append(count)
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Ticket.objects.filter(order__user=self.user).count(), 24)
+
+
+class ReservationConflictTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        self.user = get_user_model().objects.create_user("buyer@example.com", "secret")
+        self.client.force_authenticate(self.user)
+
+    def test_taken_seats_are_listed_with_integer_ids(self):
+        url = reverse("ticket_service:tickets-list")
+        seat = {"flight": self.flight.id, "row": 1, "seat": 2}
+        self.assertEqual(self.client.post(url, seat, format="json").status_code, 201)
+
+        response = self.client.post(url, [seat], format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json(),
+            {
+                "detail": "Some of the requested seats are already taken.",
+                "taken_seats": [seat],
+            },
+        )
+
+    def test_missing_holds_are_listed_with_integer_ids(self):
+        response = self.client.post(
+            reverse("ticket_service:tickets-confirm"), {"holds": [999]}, format="json"
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["holds"], [999])
+
+
+class ParallelBookingTests(ApiTransactionTestCase):
+    threads = 200
+
+    def test_parallel_bookings_never_double_sell(self):
+        flight = create_flights(1)[0]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"buyer{i}@example.com") for i in range(self.threads)
+        )
+        url = reverse("ticket_service:tickets-list")
+        barrier = threading.Barrier(self.threads)
+        statuses = Counter()
+        booked = Counter()
+        lock = threading.Lock()
+
+        def book(index, user):
+            client = APIClient()
+            client.force_authenticate(user)
+            # Every request wants one of 20 seats in columns 1-5 plus one of
+            # three window seats.
+            seats = [
+                {"flight": flight.id, "row": 1 + index % 4, "seat": 1 + index % 5},
+                {"flight": flight.id, "row": 1 + index % 3, "seat": 6},
+            ]
+            barrier.wait()
+            try:
+                response = client.post(url, seats, format="json")
+            finally:
+                connections.close_all()
+            with lock:
+                statuses[response.status_code] += 1
+                if response.status_code == 201:
+                    booked.update((s["row"], s["seat"]) for s in response.json())
+
+        workers = [
+            threading.Thread(target=book, args=(index, user))
+            for index, user in enumerate(users)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(set(statuses), {201, 409})
+        self.assertEqual(statuses[201] + statuses[409], self.threads)
+        self.assertEqual(max(booked.values()), 1)
+        self.assertEqual(
+            Ticket.objects.filter(flight=flight).count(), sum(booked.values())
+        )
+
+
+class SeatHoldTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        self.user = get_user_model().objects.create_user("buyer@example.com", "secret")
+        self.client.force_authenticate(self.user)
+
+    def seats(self, *pairs):
+        return [
+            {"flight": self.flight.id, "row": row, "seat": seat} for row, seat in pairs
+        ]
+
+    def test_booking_keeps_holds_on_other_seats(self):
+        response = self.client.post(
+            reverse("ticket_service:tickets-hold"),
+            self.seats((1, 2), (2, 1)),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(
+            reverse("ticket_service:tickets-list"),
+            self.seats((1, 1), (2, 2)),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(SeatHold.objects.values_list("row", "seat")), {(1, 2), (2, 1)}
+        )
+
+    def test_booking_consumes_own_holds(self):
+        self.client.post(
+            reverse("ticket_service:tickets-hold"),
+            self.seats((1, 1), (2, 2)),
+            format="json",
+        )
+        response = self.client.post(
+            reverse("ticket_service:tickets-list"),
+            self.seats((1, 1), (2, 1)),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(SeatHold.objects.values_list("row", "seat")), {(2, 2)})
+
+    def test_rehold_keeps_holds_on_other_seats(self):
+        url = reverse("ticket_service:tickets-hold")
+        self.client.post(url, self.seats((1, 2), (2, 1)), format="json")
+        response = self.client.post(url, self.seats((1, 1), (2, 2)), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(SeatHold.objects.filter(user=self.user).count(), 4)
+
+
+class FlightSearchIndexTests(TestCase):
+    airports = 20
+    flights_per_route = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        airplane_type = AirplaneType.objects.create(name="Narrow-body")
+        airplane = Airplane.objects.create(
+            name="A320", rows=30, seats_on_row=6, airplane_type=airplane_type
+        )
+        airports = Airport.objects.bulk_create(
+            Airport(name=f"Airport {i}") for i in range(cls.airports)
+        )
+        routes = Route.objects.bulk_create(
+            Route(source=source, destination=destination, distance=1000)
+            for source in airports
+            for destination in airports
+            if source != destination
+        )
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=DEPARTURE + timedelta(hours=6 * i),
+                arrival_time=DEPARTURE + timedelta(hours=6 * i + 2),
+            )
+            for route in routes
+            for i in range(cls.flights_per_route)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.route = routes[len(routes) // 2]
+
+    def test_route_and_date_search_uses_indexes(self):
+        filterset = FlightFilter(
+            data={
+                "route__source": self.route.source_id,
+                "route__destination": self.route.destination_id,
+                "departure_time__date": "2030-01-05",
+            },
+            queryset=Flight.objects.all(),
+        )
+        queryset = filterset.qs
+        self.assertEqual(queryset.count(), 4)
+        plan = queryset.explain()
+        self.assertIn("flight_route_departure_idx", plan)
+        self.assertIn("route_source_destination_idx", plan)
+
+
+class FlightCacheInvalidationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flights = create_flights(3)
+        self.user = get_user_model().objects.create_user("buyer@example.com", "secret")
+        self.list_url = reverse("ticket_service:flights-list")
+
+    def book(self, flight):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse("ticket_service:tickets-list"),
+                {"flight": flight.id, "row": 1, "seat": 1},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def available(self, results):
+        return {
+            flight["route_source"]: flight["tickets_available"] for flight in results
+        }
+
+    def test_booking_refreshes_detail_but_keeps_listing_cached(self):
+        listed = self.client.get(self.list_url, {"page_size": 20}).data["results"]
+        self.book(self.flights[0])
+
+        detail = self.client.get(
+            reverse("ticket_service:flights-detail", args=[self.flights[0].id])
+        )
+        self.assertEqual(detail.data["tickets_available"], 59)
+
+        response, count = self.count_queries(
+            "get", self.list_url, data={"page_size": 20}
+        )
+        self.assertEqual(count, 0)
+        self.assertEqual(response.data["results"], listed)
+
+    def test_listing_staleness_is_bounded_by_cache_timeout(self):
+        self.client.get(self.list_url, {"page_size": 20})
+        self.book(self.flights[0])
+
+        later = time.time() + caches[settings.FLIGHT_CACHE_ALIAS].default_timeout + 1
+        with mock.patch("time.time", return_value=later):
+            response = self.client.get(self.list_url, {"page_size": 20})
+        self.assertEqual(
+            self.available(response.data["results"])[str(self.flights[0].route.source)],
+            59,
+        )
+
+    def test_flight_changes_refresh_listing(self):
+        self.client.get(self.list_url, {"page_size": 20})
+        Flight.objects.filter(id=self.flights[1].id).get().delete()
+
+        response = self.client.get(self.list_url, {"page_size": 20})
+        self.assertNotIn(
+            str(self.flights[1].route.source), self.available(response.data["results"])
+        )
+
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        self.user = get_user_model().objects.create_user("buyer@example.com", "secret")
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                order=self.order, user=self.user, flight=self.flight, row=row, seat=seat
+            )
+            for row in range(1, 11)
+            for seat in range(1, 7)
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ticket_service:tickets-list")
+
+    def assert_modified(self, url, change, data=None):
+        etag = self.client.get(url, data)["ETag"]
+        self.assertEqual(
+            self.client.get(url, data, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        change()
+        response = self.client.get(url, data, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_watermark_only_reads_the_page(self):
+        response, count = self.count_queries("get", self.url, data={"page_size": 5})
+        self.assertEqual(response.status_code, 200)
+        aggregates = [
+            query["sql"]
+            for query in self.captured_queries
+            if "MAX(" in query["sql"].upper()
+        ]
+        self.assertEqual(len(aggregates), 1)
+        self.assertIn(" IN (", aggregates[0])
+
+    def test_not_modified_until_a_row_on_the_page_changes(self):
+        response = self.client.get(self.url, {"page_size": 5})
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get(
+                self.url, {"page_size": 5}, HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+
+        # Rows past the page do not change its validators...
+        last = Ticket.objects.order_by("id").last()
+        Ticket.objects.filter(id=last.id).update(
+            updated_at=last.updated_at + timedelta(days=1)
+        )
+        response = self.client.get(self.url, {"page_size": 5}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # ...rows on it do.
+        first = Ticket.objects.order_by("id").first()
+        Ticket.objects.filter(id=first.id).update(
+            updated_at=first.updated_at + timedelta(days=1)
+        )
+        response = self.client.get(self.url, {"page_size": 5}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_row_appended_after_a_full_last_page(self):
+        Ticket.objects.filter(row=10, seat=6).delete()
+        response = self.assert_modified(
+            self.url,
+            lambda: Ticket.objects.create(
+                order=self.order, user=self.user, flight=self.flight, row=10, seat=6
+            ),
+            {"page_size": 59},
+        )
+        self.assertIsNotNone(response.data["next"])
+
+    def test_ticket_removed_from_an_order(self):
+        self.assert_modified(
+            reverse("ticket_service:orders-detail", args=[self.order.id]),
+            lambda: Ticket.objects.filter(row=1, seat=1).delete(),
+        )
+
+    def test_nested_airport_renamed(self):
+        ticket = Ticket.objects.get(row=1, seat=1)
+
+        def rename():
+            airport = self.flight.route.destination
+            airport.name = "Renamed"
+            airport.save()
+
+        response = self.assert_modified(
+            reverse("ticket_service:tickets-detail", args=[ticket.id]), rename
+        )
+        self.assertEqual(
+            response.data["flight"]["route_destination"], "Renamed Airport"
+        )
+
+    def test_unpaginated_list_is_validated(self):
+        self.user.is_staff = True
+        self.user.save()
+        url = reverse("ticket_service:airports-list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class ItineraryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        self.url = reverse("ticket_service:flights-itineraries")
+
+    def search(self, origin, destination):
+        response = self.client.get(
+            self.url,
+            {
+                "origin": origin.id,
+                "destination": destination.id,
+                "date_from": DEPARTURE.date(),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_new_airport_and_route_are_labelled(self):
+        source = self.flight.route.source
+        self.search(source, self.flight.route.destination)
+
+        hub = Airport.objects.create(name="Hub", closest_big_city="Hub City")
+        route = Route.objects.create(source=source, destination=hub, distance=300)
+        Flight.objects.create(
+            route=route,
+            airplane=self.flight.airplane,
+            departure_time=DEPARTURE + timedelta(hours=1),
+            arrival_time=DEPARTURE + timedelta(hours=2),
+        )
+
+        [itinerary] = self.search(source, hub)
+        [leg] = itinerary["legs"]
+        self.assertEqual(leg["route_source"], "Source 0 Airport (City)")
+        self.assertEqual(leg["route_destination"], "Hub Airport (Hub City)")
+
+    def test_candidate_paths_are_bounded_fewest_legs_first(self):
+        graph = RouteGraph()
+        graph.version = 1
+        for route_id, (source, destination) in enumerate(
+            [(0, 9), *((0, hub) for hub in range(1, 5)), *((h, 9) for h in range(1, 5))]
+        ):
+            graph.apply_route(
+                Route(
+                    id=route_id,
+                    source_id=source,
+                    destination_id=destination,
+                    distance=100 * route_id,
+                ),
+                previous_version=1,
+                version=1,
+            )
+        self.assertEqual(graph.paths(0, 9, max_legs=2, limit=3), [[0], [1, 5], [2, 6]])
+        self.assertEqual(len(graph.paths(0, 9, max_legs=3)), 5)
+
+
+class BoardTests(ApiTestCase):
+    def test_deleted_flight_leaves_cached_boards_on_commit(self):
+        flight = create_flights(1)[0]
+        entry = BoardEntry.objects.get(flight=flight, direction=BoardEntry.DEPARTURE)
+        board = (entry.airport_id, entry.date, entry.direction)
+        key = board_cache_key(*board)
+        self.assertEqual(len(get_board(*board)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flight.delete()
+            self.assertIsNotNone(caches["default"].get(key))
+        self.assertIsNone(caches["default"].get(key))
+        self.assertEqual(get_board(*board), [])
+
+
+class ScheduleImportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        flight = create_flights(1)[0]
+        self.route = flight.route
+        self.admin = get_user_model().objects.create_user(
+            "ops@example.com", "secret", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.url = reverse("ticket_service:flights-import-schedule")
+
+    def upload(self, content, name="schedule.ndjson"):
+        return self.client.post(
+            self.url, {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+
+    def row(self, **overrides):
+        row = {
+            "source": self.route.source.name,
+            "destination": self.route.destination.name,
+            "airplane": "A320",
+            "departure_time": "2030-02-01T08:00:00Z",
+            "arrival_time": "2030-02-01T10:00:00Z",
+            "crew": ["Crew 0", "Crew 1"],
+        }
+        row.update(overrides)
+        return json.dumps(row)
+
+    def test_malformed_rows_are_reported_per_line(self):
+        lines = [
+            self.row(),
+            "[1, 2, 3]",
+            self.row(source=5),
+            self.row(departure_time="2030-13-01T00:00"),
+            self.row(crew=[1]),
+            self.row(crew={"name": "Crew 0"}),
+            "not json",
+        ]
+        response = self.upload("\n".join(lines).encode())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(
+            [error["line"] for error in response.data["errors"]], [2, 3, 4, 5, 6, 7]
+        )
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_non_utf8_upload_is_rejected_before_importing(self):
+        content = (self.row() + "\n").encode() + "Zürich\n".encode("latin-1")
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("file", response.data)
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_command_reports_what_was_committed_before_a_bad_line(self):
+        row = json.loads(self.row(crew="Crew 0"))
+        with tempfile.NamedTemporaryFile(suffix=".csv") as schedule:
+            schedule.write(",".join(SCHEDULE_FIELDS).encode() + b"\n")
+            # Past the first read buffers, so some batches commit first.
+            csv_line = ",".join(row[field] for field in SCHEDULE_FIELDS)
+            schedule.write((csv_line + "\n").encode() * 1000)
+            schedule.write("Zürich\n".encode("latin-1"))
+            schedule.flush()
+            with self.assertRaises(CommandError) as raised:
+                call_command(
+                    "import_schedule",
+                    schedule.name,
+                    batch_size=100,
+                    stdout=io.StringIO(),
+                )
+        created, line = re.search(
+            r"(\d+) flights up to line (\d+) were imported", str(raised.exception)
+        ).groups()
+        self.assertGreater(int(created), 0)
+        self.assertEqual(int(line), int(created) + 1)
+        self.assertEqual(Flight.objects.count(), int(created) + 1)
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_user(
+            "finance@example.com", "secret", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.url = reverse("ticket_service:orders-export")
+
+    def add_orders(self, count):
+        Order.objects.bulk_create(
+            (Order(user=self.admin) for _ in range(count)), batch_size=2000
+        )
+
+    def stream(self, **params):
+        """Consume an export and return its size and the peak traced memory."""
+        tracemalloc.start()
+        try:
+            response = self.client.get(self.url, params)
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return response, size, peak
+
+    def test_invalid_dates_are_rejected(self):
+        for value in ("yesterday", "2024-13-01T00:00"):
+            response = self.client.get(self.url, {"created_after": value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("created_after", response.json())
+
+    def test_peak_memory_does_not_grow_with_row_count(self):
+        self.add_orders(5_000)
+        _, small_size, small_peak = self.stream(output="ndjson")
+        self.add_orders(45_000)
+        response, large_size, large_peak = self.stream(output="ndjson")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(large_size, 9 * small_size)
+        self.assertLess(large_peak, 2 * small_peak)
+        self.assertLess(large_peak, large_size / 4)
+
+
+class ValuesSerializerContractTests(ApiTestCase):
+    """The values() read path must render byte-identical JSON to the serializers."""
+
+    def setUp(self):
+        super().setUp()
+        flights = create_flights(4)
+        Airport.objects.filter(id=flights[0].route.destination_id).update(
+            closest_big_city="Big City"
+        )
+        Flight.objects.filter(id=flights[1].id).update(
+            departure_time=DEPARTURE + timedelta(microseconds=123456)
+        )
+        self.admin = get_user_model().objects.create_user(
+            "admin@example.com", "secret", is_staff=True
+        )
+        buyer = get_user_model().objects.create_user("buyer@example.com", "secret")
+        for index, flight in enumerate(flights[:3]):
+            order = Order.objects.create(user=buyer if index else self.admin)
+            Ticket.objects.bulk_create(
+                Ticket(order=order, user=order.user, flight=flight, row=1, seat=seat)
+                for seat in range(1, 2 + index)
+            )
+        Order.objects.create(user=buyer)
+        self.client.force_authenticate(self.admin)
+
+    def assert_identical(self, viewset, name, **params):
+        url = reverse(f"ticket_service:{name}")
+        values = self.client.get(url, params)
+        for cache in caches.all():
+            cache.clear()
+        with mock.patch.object(viewset, "values_serializer_class", None):
+            model = self.client.get(url, params)
+        self.assertEqual(values.status_code, 200)
+        self.assertEqual(values.content, model.content)
+
+    def test_flight_list(self):
+        self.assert_identical(FlightList, "flights-list", page_size=20)
+
+    def test_ticket_list(self):
+        self.assert_identical(TicketList, "tickets-list", page_size=2)
+
+    def test_order_list(self):
+        self.assert_identical(OrderViewSet, "orders-list")
+
+    async def test_async_flight_detail(self):
+        flight = await Flight.objects.order_by("id").afirst()
+        sync = await sync_to_async(self.client.get)(
+            reverse("ticket_service:flights-detail", args=[flight.id])
+        )
+        response = await self.async_client.get(
+            reverse("ticket_service:async-flights-detail", args=[flight.id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, sync.content)
+
+
+class ReplicaPinTests(ApiTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        self.user = get_user_model().objects.create_user("buyer@example.com", "secret")
+
+    def route_catalog_read(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        token = _current_request.set(request)
+        try:
+            with override_settings(DATABASE_REPLICAS=["replica_0"]):
+                return ReplicaRouter().db_for_read(Flight)
+        finally:
+            _current_request.reset(token)
+
+    def test_writes_pin_the_user_in_the_shared_pin_cache(self):
+        self.assertEqual(self.route_catalog_read(), "replica_0")
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse("ticket_service:tickets-list"),
+            {"flight": self.flight.id, "row": 1, "seat": 1},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        pins = caches[settings.REPLICA_PIN_CACHE_ALIAS]
+        self.assertTrue(pins.get(primary_pin_key(self.user.pk)))
+        self.assertIsNone(caches["default"].get(primary_pin_key(self.user.pk)))
+        self.assertIsNone(self.route_catalog_read())
+
+
+class InstrumentationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = create_flights(1)[0]
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def recorded_queries(self, endpoint):
+        return registry.histograms["db_queries"][endpoint].total
+
+    def test_sync_request_queries_are_recorded(self):
+        self.client.get(reverse("ticket_service:flights-detail", args=[self.flight.id]))
+        self.assertEqual(self.recorded_queries("flights-retrieve"), 2)
+
+    async def test_queries_in_sync_to_async_threads_are_recorded(self):
+        url = reverse("ticket_service:async-flights-detail", args=[self.flight.id])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.recorded_queries("async-flights-detail"), 2)
+
+
+class SeedDataTests(TestCase):
+    sizes = {"airports": 5, "routes": 8, "airplanes": 2, "flights": 6, "users": 3}
+
+    def seed(self, **options):
+        call_command("seed_data", stdout=io.StringIO(), **self.sizes, **options)
+
+    def test_extreme_load_factors(self):
+        self.seed(seed=1, load_factor=0)
+        self.assertFalse(Ticket.objects.exists())
+        self.seed(seed=2, load_factor=1)
+        capacity = sum(
+            flight.airplane.rows * flight.airplane.seats_on_row
+            for flight in Flight.objects.filter(
+                route__source__name__startswith="synthetic-2 "
+            ).select_related("airplane")
+        )
+        self.assertEqual(Ticket.objects.count(), capacity)
+
+    def test_departures_do_not_depend_on_the_current_day(self):
+        self.seed(seed=4, days=2)
+        days = {
+            departure.date()
+            for departure in Flight.objects.values_list("departure_time", flat=True)
+        }
+        self.assertLessEqual(days, {DEFAULT_START, DEFAULT_START + timedelta(days=1)})
+
+    def test_rerunning_a_seed_fails_cleanly(self):
+        self.seed(seed=3)
+        flights = Flight.objects.count()
+        with self.assertRaisesMessage(CommandError, "seed 3 already exists"):
+            self.seed(seed=3)
+        self.assertEqual(Flight.objects.count(), flights)
+
+
+class BenchmarkSmokeTests(TestCase):
+    dataset = {"airports": 6, "routes": 10, "airplanes": 2, "flights": 12, "users": 4}
+
+    def run_benchmark(self, *args, **options):
+        call_command(
+            "benchmark",
+            *args,
+            stdout=io.StringIO(),
+            **{"repeat": 2, **self.dataset, **options},
+        )
+
+    def test_results_can_be_compared_with_a_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            self.run_benchmark(output=output)
+            with open(output, encoding="utf-8") as results_file:
+                report = json.load(results_file)
+            self.assertEqual(
+                set(report["results"]),
+                {
+                    "flight_search",
+                    "flight_detail",
+                    "ticket_bulk_create",
+                    "order_create",
+                    "order_list",
+                },
+            )
+            for result in report["results"].values():
+                self.assertGreater(result["queries"], 0)
+            self.assertFalse(Flight.objects.exists())
+
+            self.run_benchmark(baseline=output, threshold=1000)
+
+            for result in report["results"].values():
+                result["queries"] -= 1
+            with open(output, "w", encoding="utf-8") as results_file:
+                json.dump(report, results_file)
+            with self.assertRaisesMessage(CommandError, "Regressions"):
+                self.run_benchmark(baseline=output, threshold=1000)
+
+    def test_empty_datasets_are_rejected_with_a_clear_error(self):
+        with self.assertRaisesMessage(CommandError, "--users must be at least 1"):
+            self.run_benchmark(users=0)
+        with (
+            mock.patch("ticket_service.synthetic._load_factor", return_value=0),
+            self.assertRaisesMessage(CommandError, "no orders"),
+        ):
+            self.run_benchmark()
+
+
+class UserCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = get_user_model().objects.create_user(
+            "staff@example.com", "secret", is_staff=True
+        )
+        self.buyer = get_user_model().objects.create_user("buyer@example.com", "secret")
+        Order.objects.create(user=self.buyer)
+        response = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "staff@example.com", "password": "secret"},
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.url = reverse("ticket_service:orders-list")
+
+    def user_queries(self):
+        table = get_user_model()._meta.db_table
+        return [q for q in self.captured_queries if f'FROM "{table}"' in q["sql"]]
+
+    def test_users_are_cached_in_the_shared_user_cache(self):
+        self.count_queries("get", self.url)
+        self.assertEqual(len(self.user_queries()), 1)
+        self.count_queries("get", self.url)
+        self.assertEqual(self.user_queries(), [])
+        self.assertIsNotNone(
+            caches[settings.AUTH_USER_CACHE_ALIAS].get(user_cache_key(self.staff.pk))
+        )
+        self.assertIsNone(caches["default"].get(user_cache_key(self.staff.pk)))
+
+    def test_demotion_applies_on_the_next_request(self):
+        self.assertEqual(len(self.client.get(self.url).data["results"]), 1)
+        self.staff.is_staff = False
+        self.staff.save()
+        self.assertEqual(self.client.get(self.url).data["results"], [])
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.throttle = TokenBucketThrottle()
+        self.request = RequestFactory().get("/")
+        self.request.user = get_user_model()(pk=1)
+        self.view = mock.Mock(
+            action="list", throttle_scopes={}, throttle_scope="default"
+        )
+        self.interval = parse_rate(api_settings.DEFAULT_THROTTLE_RATES["default"])[0]
+
+    def allow(self, now):
+        with mock.patch("time.time", return_value=now):
+            return self.throttle.allow_request(self.request, self.view)
+
+    def test_users_keep_the_daily_budget(self):
+        self.assertEqual(api_settings.DEFAULT_THROTTLE_RATES["default"], "100/day")
+        self.assertTrue(all(self.allow(1000.0) for _ in range(100)))
+        self.assertFalse(self.allow(1000.0))
+
+    def test_refill_keeps_concurrent_charges(self):
+        # Near the real clock, which LocMemCache expires keys by.
+        start = int(time.time())
+        self.assertTrue(self.allow(start))
+        cache = self.throttle.cache
+        key = self.throttle.get_cache_key("default", 1)
+        add = cache.add
+
+        def add_after_another_charge(*args, **kwargs):
+            cache.incr(key, self.interval)
+            return add(*args, **kwargs)
+
+        with mock.patch.object(cache, "add", side_effect=add_after_another_charge):
+            self.assertTrue(self.allow(start + 86_400))
+        self.assertEqual(cache.get(key), (start + 86_400) * 1000 + 2 * self.interval)
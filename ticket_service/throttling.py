@@ -0,0 +1,114 @@
+"""Token-bucket rate limiting with per-endpoint scopes on a shared cache.
+
+Every request is charged against exactly one bucket, picked by the view:
+``throttle_scopes`` maps actions to scopes (``search``, ``booking``,
+``export``...) and ``throttle_scope`` is the fallback for everything else.
+Rates come from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] in DRF's
+``<requests>/<period>`` form; anonymous clients use ``<scope>_anon`` when
+it is configured. A rate of ``None`` switches throttling off for a scope.
+
+Buckets are kept with the generic cell rate algorithm: the only state is
+the bucket's "theoretical arrival time" in milliseconds, advanced with a
+single atomic ``incr`` per request; a bucket that has refilled completely
+is moved up to the current time with one more ``add`` and ``incr``, so it
+is never overwritten. Any cache with an atomic ``incr`` works as the shared
+backend (Redis, Memcached); the local-memory default is the single-process
+stand-in used in development and tests. Workers sharing a
+backend are assumed to have synchronised clocks.
+"""
+
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_THROTTLE_SCOPE = "default"
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Idle buckets expire after this many seconds at least; a bucket that is
+# still refilling when its key expires merely starts over full.
+MIN_BUCKET_TIMEOUT = 60 * 60
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Return ``(interval_ms, tolerance_ms, timeout)`` for ``"<n>/<period>"``.
+
+    A bucket holds ``n`` tokens and regains one every ``interval_ms``.
+    """
+    num, period = rate.split("/")
+    num_requests = int(num)
+    interval = max(1, PERIODS[period[0]] * 1000 // num_requests)
+    tolerance = interval * num_requests
+    return interval, tolerance, max(MIN_BUCKET_TIMEOUT, 2 * tolerance // 1000)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    cache_alias = settings.THROTTLE_CACHE_ALIAS
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        self.cache = caches[self.cache_alias]
+        self.wait_seconds = None
+
+    def get_scope(self, request, view):
+        scopes = getattr(view, "throttle_scopes", {})
+        scope = scopes.get(getattr(view, "action", None))
+        return scope or getattr(view, "throttle_scope", DEFAULT_THROTTLE_SCOPE)
+
+    def get_rate(self, scope, anonymous):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if anonymous and f"{scope}_anon" in rates:
+            return rates[f"{scope}_anon"]
+        try:
+            return rates[scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{scope}' scope"
+            )
+
+    def get_cache_key(self, scope, ident):
+        return self.cache_format % {"scope": scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if request.user and request.user.is_authenticated:
+            rate = self.get_rate(scope, anonymous=False)
+            key = self.get_cache_key(scope, request.user.pk)
+        else:
+            rate = self.get_rate(scope, anonymous=True)
+            key = self.get_cache_key(f"{scope}_anon", self.get_ident(request))
+        if rate is None:
+            return True
+        interval, tolerance, timeout = parse_rate(rate)
+        now = int(time.time() * 1000)
+
+        try:
+            arrival = self.cache.incr(key, interval)
+        except ValueError:
+            if self.cache.add(key, now + interval, timeout):
+                return True
+            arrival = self.cache.incr(key, interval)
+
+        if arrival - interval < now:
+            # The bucket had refilled completely; move it up to now. Only the
+            # request that wins the add() adds the gap, and it does so with
+            # incr() so that concurrent charges are kept.
+            if self.cache.add(f"{key}:refill", 1, math.ceil(interval / 1000)):
+                try:
+                    self.cache.incr(key, now + interval - arrival)
+                except ValueError:
+                    pass
+            return True
+        if arrival - now > tolerance:
+            self.cache.decr(key, interval)
+            self.wait_seconds = (arrival - now - tolerance) / 1000
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from ticket_service import async_views
+
 from ticket_service.views import FlightList, CrewList, AirplaneTypeList, AirplaneList, TicketList, AirportList, \
-    RouteList, OrderViewSet
+    RouteList, OrderViewSet, DepartureBoardViewSet, FlightScheduleViewSet, MetricsViewSet
 
 app_name = 'ticket_service'
 
@@ -12,8 +14,21 @@ router.register("crew", CrewList, basename="crew")
 router.register("airplane_types", AirplaneTypeList, basename="airplane_types")
 router.register("airplanes", AirplaneList, basename="airplanes")
 router.register("airports", AirportList, basename="airports")
+router.register("boards", DepartureBoardViewSet, basename="boards")
 router.register("routes", RouteList, basename="routes")
+router.register("schedules", FlightScheduleViewSet, basename="schedules")
 router.register("tickets", TicketList, basename="tickets")
 router.register("orders", OrderViewSet, basename="orders")
+router.register("metrics", MetricsViewSet, basename="metrics")
 
-urlpatterns = [path("", include(router.urls))]
\ No newline at end of file
+urlpatterns = [
+    path("async/flights/", async_views.flight_list, name="async-flights-list"),
+    path("async/flights/<int:pk>/", async_views.flight_detail, name="async-flights-detail"),
+    path("async/flights/<int:pk>/seats/", async_views.flight_seats, name="async-flights-seats"),
+    path(
+        "async/flights/<int:pk>/seats/events/",
+        async_views.flight_seat_events,
+        name="async-flights-seat-events",
+    ),
+    path("", include(router.urls)),
+]
\ No newline at end of file
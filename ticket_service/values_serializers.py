@@ -0,0 +1,127 @@
+from operator import itemgetter
+
+from rest_framework import serializers
+
+from ticket_service.instrumentation import serializer_timer
+from ticket_service.models import Airport
+
+_datetime_field = serializers.DateTimeField(read_only=True)
+
+
+def _nullable(convert):
+    def mapper(value):
+        return None if value is None else convert(value)
+
+    return mapper
+
+
+def as_datetime(value):
+    return _datetime_field.to_representation(value)
+
+
+class ValuesSerializer:
+    """Read-only rendering of ``values()`` rows with precompiled mappers.
+
+    Subclasses declare ``fields`` as ``(output name, columns, convert)``
+    triples; ``convert`` receives the column values in order and must
+    reproduce what the matching ModelSerializer emits for the same row.
+    Mappers are built once per class, so rendering a row is a dict
+    comprehension over plain tuples instead of a walk over bound DRF fields.
+    """
+
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.columns = tuple(
+            dict.fromkeys(column for _, columns, _ in cls.fields for column in columns)
+        )
+        cls._mappers = tuple(
+            (name, cls._compile(columns, convert))
+            for name, columns, convert in cls.fields
+        )
+
+    @staticmethod
+    def _compile(columns, convert):
+        if len(columns) == 1:
+            get = itemgetter(columns[0])
+            if convert is None:
+                return get
+            return lambda row: convert(get(row))
+        get = itemgetter(*columns)
+        return lambda row: convert(*get(row))
+
+    @classmethod
+    def prepare(cls, queryset, extra_columns=()):
+        """Project ``queryset`` onto the columns the mappers (and pagination) need."""
+        columns = dict.fromkeys((*cls.columns, *extra_columns))
+        return queryset.prefetch_related(None).values(*columns)
+
+    @classmethod
+    def serialize(cls, rows):
+        mappers = cls._mappers
+        with serializer_timer():
+            return [{name: mapper(row) for name, mapper in mappers} for row in rows]
+
+
+class FlightListValuesSerializer(ValuesSerializer):
+    """Same output as FlightListSerializer."""
+
+    fields = (
+        ("airplane_name", ("airplane__name",), _nullable(str)),
+        (
+            "route_source",
+            ("route__source__name", "route__source__closest_big_city"),
+            Airport.display_name,
+        ),
+        (
+            "route_destination",
+            ("route__destination__name", "route__destination__closest_big_city"),
+            Airport.display_name,
+        ),
+        ("departure_time", ("departure_time",), as_datetime),
+        ("arrival_time", ("arrival_time",), as_datetime),
+        ("tickets_available", ("tickets_available",), _nullable(int)),
+    )
+
+
+class TicketListValuesSerializer(ValuesSerializer):
+    """Same output as TicketListSerializer."""
+
+    fields = (
+        ("id", ("id",), None),
+        ("row", ("row",), None),
+        ("seat", ("seat",), None),
+        ("flight", ("flight",), None),
+    )
+
+
+class OrderListValuesSerializer(ValuesSerializer):
+    """Same output as OrderListSerializer."""
+
+    fields = (
+        ("id", ("id",), None),
+        ("user", ("user__email",), lambda email: {"email": email}),
+        ("created_at", ("created_at",), as_datetime),
+    )
+
+
+class FlightDetailValuesSerializer(ValuesSerializer):
+    """FlightDetailSerializer output minus ``crew``, which is many-to-many."""
+
+    fields = (
+        ("airplane", ("airplane",), None),
+        (
+            "route_source",
+            ("route__source__name", "route__source__closest_big_city"),
+            Airport.display_name,
+        ),
+        (
+            "route_destination",
+            ("route__destination__name", "route__destination__closest_big_city"),
+            Airport.display_name,
+        ),
+        ("departure_time", ("departure_time",), as_datetime),
+        ("arrival_time", ("arrival_time",), as_datetime),
+        ("tickets_available", ("tickets_available",), _nullable(int)),
+    )
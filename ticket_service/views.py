@@ -1,13 +1,42 @@
-from rest_framework import viewsets
+from datetime import timedelta
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.generics import mixins
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, extend_schema_view
 
-from ticket_service.models import Flight, Crew, AirplaneType, Airplane, Route, Ticket, Airport, Order
+from ticket_service.boards import get_board
+from ticket_service.cache import CachedFlightResponseMixin
+from ticket_service.exports import (EXPORT_CONTENT_TYPES,
+                                    ORDER_EXPORT_FIELDS,
+                                    TICKET_EXPORT_FIELDS,
+                                    export_response,
+                                    filter_created)
+from ticket_service.filters import FlightFilter
+from ticket_service.instrumentation import PrometheusRenderer, registry
+from ticket_service.itineraries import search_itineraries
+from ticket_service.mixins import ConditionalGetMixin, ValuesListMixin
+from ticket_service.models import Flight, Crew, AirplaneType, Airplane, Route, Ticket, Airport, Order, FlightSchedule
+from ticket_service.reservations import confirm_holds, hold_seats, release_holds
+from ticket_service.schedule_import import import_uploaded_schedule
+from ticket_service.schedules import book_occurrence, expand_schedules
+from ticket_service.seat_map import get_seat_map
 from ticket_service.serializers import (FlightSerializer,
                                         FlightListSerializer,
                                         FlightDetailSerializer,
+                                        ItinerarySearchSerializer,
+                                        BoardQuerySerializer,
+                                        FlightScheduleSerializer,
+                                        OccurrenceQuerySerializer,
+                                        ScheduleBookingSerializer,
                                         CrewSerializer,
                                         AirplaneTypeSerializer,
                                         AirplaneSerializer,
@@ -19,35 +48,78 @@ from ticket_service.serializers import (FlightSerializer,
                                         TicketDetailSerializer,
                                         OrderListSerializer,
                                         OrderCreateSerializer,
-                                        OrderDetailSerializer)
+                                        OrderDetailSerializer,
+                                        SeatHoldSerializer,
+                                        SeatHoldActionSerializer)
+from ticket_service.values_serializers import (FlightListValuesSerializer,
+                                               OrderListValuesSerializer,
+                                               TicketListValuesSerializer)
 
 
-class CrewList(viewsets.ModelViewSet):
+class CrewList(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = [IsAdminUser]
 
 
-class AirplaneTypeList(viewsets.ModelViewSet):
+class AirplaneTypeList(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = [IsAdminUser]
 
 
-class AirplaneList(viewsets.ModelViewSet):
+class AirplaneList(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
     permission_classes = [IsAdminUser]
+    watermark_fields = ("updated_at", "airplane_type__updated_at")
 
 
-class AirportList(viewsets.ModelViewSet):
+class AirportList(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Airport.objects.all()
     serializer_class = AirportDetailSerializer
     permission_classes = [IsAdminUser]
 
-class RouteList(viewsets.ModelViewSet):
+class DepartureBoardViewSet(viewsets.ViewSet):
+    """Read-only departure/arrival boards served from BoardEntry rows."""
+
+    permission_classes = [AllowAny]
+    throttle_scope = "search"
+    lookup_value_regex = r"\d+"
+
+    def retrieve(self, request, pk=None):
+        serializer = BoardQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        date = serializer.validated_data.get("date") or timezone.localdate()
+        direction = serializer.validated_data["direction"]
+        flights = get_board(pk, date, direction)
+        if not flights:
+            get_object_or_404(Airport, pk=pk)
+        return Response(
+            {
+                "airport": int(pk),
+                "date": date,
+                "direction": direction,
+                "flights": flights,
+            }
+        )
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """Per-endpoint request histograms in the Prometheus text format."""
+
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+    throttle_classes = []
+
+    def list(self, request):
+        return Response(registry.render())
+
+
+class RouteList(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Route.objects.all()
     permission_classes = [IsAdminUser]
+    watermark_fields = ("updated_at", "source__updated_at", "destination__updated_at")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -55,13 +127,33 @@ class RouteList(viewsets.ModelViewSet):
         return RouteDetailSerializer
 
 
-class FlightSetPagination(PageNumberPagination):
+class FlightSetPagination(CursorPagination):
     page_size = 2
     page_size_query_param = 'page_size'
     max_page_size = 20
+    ordering = ("departure_time", "id")
 
 
-class FlightList(mixins.ListModelMixin,
+class IdCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = "id"
+
+
+@extend_schema_view(
+    list=extend_schema(
+        description=(
+            "Search materialized flights. Occurrences of recurring schedules get a "
+            "Flight row only when their first ticket is booked, so unsold ones are "
+            "not listed here: search them with GET /schedules/occurrences/ and book "
+            "them with POST /schedules/{id}/book/."
+        )
+    )
+)
+class FlightList(CachedFlightResponseMixin,
+                 ValuesListMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  mixins.CreateModelMixin,
                  mixins.UpdateModelMixin,
@@ -69,8 +161,31 @@ class FlightList(mixins.ListModelMixin,
                  viewsets.GenericViewSet):
     queryset = Flight.objects.all()
     pagination_class = FlightSetPagination
-    filter_backends = (DjangoFilterBackend,)
-    filterset_fields = ["route__destination", "departure_time", "route__source"]
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filterset_class = FlightFilter
+    ordering_fields = ["departure_time", "tickets_available"]
+    ordering = ("departure_time", "id")
+    values_serializer_class = FlightListValuesSerializer
+    throttle_scopes = {
+        "list": "search",
+        "retrieve": "search",
+        "seats": "search",
+        "itineraries": "search",
+    }
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action in ["list", "retrieve", "update", "partial_update"]:
+            queryset = queryset.select_related(
+                "airplane",
+                "route__source",
+                "route__destination",
+            ).with_tickets_available()
+        if self.action in ["retrieve", "update", "partial_update"]:
+            queryset = queryset.prefetch_related("crew")
+        if self.action == "seats":
+            queryset = queryset.select_related("airplane")
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -79,15 +194,108 @@ class FlightList(mixins.ListModelMixin,
             return FlightSerializer
         return FlightDetailSerializer
 
+    @action(detail=True, methods=["get"], filter_backends=[])
+    def seats(self, request, pk=None):
+        """Seat occupancy as a base64 bitmap; pass ?grid=true for row strings."""
+        flight = self.get_object()
+        grid = request.query_params.get("grid", "").lower() in ("1", "true")
+        return Response(get_seat_map(flight).to_representation(grid=grid))
+
+    @action(detail=False, methods=["get"], filter_backends=[], pagination_class=None)
+    def itineraries(self, request):
+        """Direct and connecting (up to 2-stop) itineraries between two airports."""
+        serializer = ItinerarySearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        return Response(
+            search_itineraries(
+                origin=params["origin"].id,
+                destination=params["destination"].id,
+                date_from=params["date_from"],
+                date_to=params["date_to"],
+                max_stops=params["max_stops"],
+                min_connection=timedelta(minutes=params["min_connection"]),
+                max_connection=timedelta(minutes=params["max_connection"]),
+                ordering=params["ordering"],
+                limit=params["limit"],
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        filter_backends=[],
+        parser_classes=[MultiPartParser],
+    )
+    def import_schedule(self, request):
+        """Bulk-import a CSV/NDJSON schedule uploaded as ``file``."""
+        uploaded_file = request.FILES.get("file")
+        if uploaded_file is None:
+            return Response({"file": ["No schedule file uploaded."]}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get("format")
+        if fmt not in (None, "csv", "ndjson"):
+            return Response({"format": ["Use csv or ndjson."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = import_uploaded_schedule(uploaded_file, fmt=fmt)
+        except UnicodeDecodeError:
+            return Response({"file": ["Schedule files must be UTF-8 encoded."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK)
+
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "seats", "itineraries"]:
             return [AllowAny()]
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "import_schedule"]:
             return [IsAdminUser()]
         return super().get_permissions()
 
 
-class TicketList(mixins.ListModelMixin,
+class FlightScheduleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = FlightSchedule.objects.select_related("route", "airplane").prefetch_related("crew")
+    serializer_class = FlightScheduleSerializer
+    throttle_scopes = {"occurrences": "search", "book": "booking"}
+
+    @action(detail=False, methods=["get"], filter_backends=[], pagination_class=None)
+    def occurrences(self, request):
+        """Lazily expanded occurrences of every schedule in a date window.
+
+        Unlike /flights/, this includes occurrences nobody has booked yet.
+        """
+        serializer = OccurrenceQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        schedules = FlightSchedule.objects.all()
+        if "source" in params:
+            schedules = schedules.filter(route__source_id=params["source"])
+        if "destination" in params:
+            schedules = schedules.filter(route__destination_id=params["destination"])
+        return Response(expand_schedules(schedules, params["date_from"], params["date_to"]))
+
+    @action(detail=True, methods=["post"])
+    def book(self, request, pk=None):
+        """Book seats on one occurrence; its Flight is created on the first booking."""
+        schedule = self.get_object()
+        serializer = ScheduleBookingSerializer(data=request.data, context={"schedule": schedule})
+        serializer.is_valid(raise_exception=True)
+        tickets = book_occurrence(
+            schedule,
+            serializer.validated_data["date"],
+            serializer.validated_data["tickets"],
+            request.user,
+        )
+        return Response(TicketListSerializer(tickets, many=True).data, status=status.HTTP_201_CREATED)
+
+    def get_permissions(self):
+        if self.action == "occurrences":
+            return [AllowAny()]
+        if self.action == "book":
+            return [IsAuthenticated()]
+        return [IsAdminUser()]
+
+
+class TicketList(ConditionalGetMixin,
+                 ValuesListMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  mixins.CreateModelMixin,
                  mixins.UpdateModelMixin,
@@ -95,8 +303,26 @@ class TicketList(mixins.ListModelMixin,
                  viewsets.GenericViewSet):
 
     queryset = Ticket.objects.all()
+    pagination_class = IdCursorPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ["flight",]
+    # Everything TicketDetailSerializer embeds from the flight.
+    watermark_fields = (
+        "updated_at",
+        "flight__updated_at",
+        "flight__airplane__updated_at",
+        "flight__route__updated_at",
+        "flight__route__source__updated_at",
+        "flight__route__destination__updated_at",
+    )
+    values_serializer_class = TicketListValuesSerializer
+    throttle_scopes = {
+        "create": "booking",
+        "hold": "booking",
+        "confirm": "booking",
+        "export": "export",
+    }
+
     def get_queryset(self):
         user = self.request.user
         if user.is_staff:
@@ -109,25 +335,83 @@ class TicketList(mixins.ListModelMixin,
             return queryset.prefetch_related("flight__airplane")
         return queryset
 
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ["create", "hold"] and isinstance(kwargs.get("data"), list):
+            kwargs["many"] = True
+        return super().get_serializer(*args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action in ["list"]:
             return TicketListSerializer
-        if self.action == "create":
+        if self.action in ["create", "hold"]:
             return TicketCreateSerializer
+        if self.action in ["confirm", "release"]:
+            return SeatHoldActionSerializer
         return TicketDetailSerializer
 
+    @action(detail=False, methods=["post"])
+    def hold(self, request):
+        """Hold seats for settings.SEAT_HOLD_TTL seconds while the user pays."""
+        data = request.data if isinstance(request.data, list) else [request.data]
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        holds = hold_seats(request.user, serializer.validated_data)
+        return Response(SeatHoldSerializer(holds, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def confirm(self, request):
+        """Book held seats as tickets of a new order."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tickets = confirm_holds(request.user, serializer.validated_data["holds"])
+        return Response(TicketListSerializer(tickets, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """Stream all visible tickets; ?output=csv|ndjson, ?created_after=/created_before=."""
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_CONTENT_TYPES:
+            return Response({"output": ["Use csv or ndjson."]}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = filter_created(
+            self.filter_queryset(self.get_queryset()),
+            request.query_params,
+            "order__created_at",
+        )
+        return export_response(queryset, TICKET_EXPORT_FIELDS, output, "tickets")
+
+    @action(detail=False, methods=["post"])
+    def release(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        release_holds(request.user, serializer.validated_data["holds"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def get_permissions(self):
-        if self.action in ["list", "retrieve", "create"]:
+        if self.action in ["list", "retrieve", "create", "hold", "confirm", "release"]:
             return [IsAuthenticated()]
-        if self.action in ["partial_update", "destroy", "update"]:
+        if self.action in ["partial_update", "destroy", "update", "export"]:
             return [IsAdminUser()]
         return super().get_permissions()
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
+    pagination_class = IdCursorPagination
+    watermark_fields = (
+        "updated_at",
+        "tickets__updated_at",
+        "tickets__flight__updated_at",
+        "tickets__flight__airplane__updated_at",
+        "tickets__flight__route__updated_at",
+        "tickets__flight__route__source__updated_at",
+        "tickets__flight__route__destination__updated_at",
+    )
+    watermark_relations = ("tickets",)
+    values_serializer_class = OrderListValuesSerializer
+    throttle_scopes = {"create": "booking", "export": "export"}
+
     def get_queryset(self):
         user = self.request.user
         if user.is_staff:
@@ -137,12 +421,21 @@ class OrderViewSet(viewsets.ModelViewSet):
         else:
             queryset = Order.objects.none()
         if self.action == 'list':
-            return queryset.prefetch_related("tickets__user")
+            return queryset.select_related("user")
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """Stream all visible orders; ?output=csv|ndjson, ?created_after=/created_before=."""
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_CONTENT_TYPES:
+            return Response({"output": ["Use csv or ndjson."]}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = filter_created(self.get_queryset(), request.query_params, "created_at")
+        return export_response(queryset, ORDER_EXPORT_FIELDS, output, "orders")
+
     def get_serializer_class(self):
         if self.action in ["list"]:
             return OrderListSerializer
@@ -153,6 +446,6 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
             return [IsAuthenticated()]
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "export"]:
             return [IsAdminUser()]
         return super().get_permissions()